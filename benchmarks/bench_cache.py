@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Benchmark memory and lookup throughput of Cache vs. CompactCache.
+
+Usage:
+
+    python benchmarks/bench_cache.py [--entries N [N ...]]
+
+Each entry is a record (pid, parent pid, bucket id) with a file (key, file
+id, size), like a downloads cache. Every entry is then looked up the way
+ingestion does. Memory is measured as growth of the resident set (Linux) of
+a fresh process per measurement, so 10M entries need several GB of RAM.
+"""
+
+import argparse
+import concurrent.futures
+import gc
+import os
+import time
+import uuid
+
+from invenio_analytics_importer.cache import Cache, CompactCache
+
+
+def generate_entries(number):
+    """Yield (pid, parent pid, bucket id, file key, file id, size)."""
+    for i in range(number):
+        yield (
+            f"{i:05x}-{i % 99991:05x}",
+            f"{i // 2:05x}-p{i % 9973:04x}",
+            uuid.UUID(int=2 * i + 1),
+            f"data-{i % 7}.csv",
+            str(uuid.UUID(int=2 * i + 2)),
+            i,
+        )
+
+
+def fill(cache_cls, entries):
+    """Return cache_cls instance filled with entries."""
+    cache = cache_cls()
+    for pid, parent, bucket_id, key, file_id, size in entries:
+        cache.set_parent_pid(pid, parent)
+        cache.set_bucket_id(pid, bucket_id)
+        cache.set_file_id(pid, key, file_id)
+        cache.set_size(file_id, size)
+    return cache
+
+
+def get_rss():
+    """Return resident memory of process in bytes (Linux only)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def look_up(cache, pids_and_keys):
+    """Look up all metadata of (pid, file key) like ingestion does."""
+    for pid, key in pids_and_keys:
+        cache.get_parent_pid(pid)
+        cache.get_bucket_id(pid)
+        cache.get_size(cache.get_file_id(pid, key))
+
+
+def measure(cache_cls, number):
+    """Return (bytes, lookups per second) of cache_cls filled with number."""
+    pids_and_keys = [(e[0], e[3]) for e in generate_entries(number)]
+    gc.collect()
+    rss = get_rss()
+    # Entries are generated on the fly, so that only what the cache keeps of
+    # them is accounted for
+    cache = fill(cache_cls, generate_entries(number))
+    gc.collect()
+    size = get_rss() - rss
+
+    start = time.perf_counter()
+    look_up(cache, pids_and_keys)
+    seconds = time.perf_counter() - start
+    return size, number / seconds
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--entries", type=int, nargs="+", default=[1_000_000, 10_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'cache':<14}{'entries':>10}{'MB':>9}{'B/entry':>9}"
+          f"{'lookups/s':>11}")
+    for number in args.entries:
+        for cache_cls in (Cache, CompactCache):
+            # A fresh process doesn't reuse memory freed by previous runs
+            with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                size, rate = executor.submit(
+                    measure, cache_cls, number
+                ).result()
+            print(
+                f"{cache_cls.__name__:<14}{number:>10}{size / 1e6:>9.0f}"
+                f"{size / number:>9.0f}{rate:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
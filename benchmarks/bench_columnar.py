@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Benchmark reading converted analytics from raw vs. columnar files.
+
+Usage:
+
+    python benchmarks/bench_columnar.py [--records N] [--days N]
+
+The same month of synthetic analytics (see bench_compression.py) is read
+from its raw JSON file and from its columnar (.iac) conversion.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bench_compression import generate_month
+
+from invenio_analytics_importer.columnar import write_columnar
+from invenio_analytics_importer.convert import (
+    generate_analytics_from_filepaths,
+)
+from invenio_analytics_importer.write import write_json
+
+
+def measure(kind, filepath):
+    """Return (number of analytics, seconds) to read them from filepath."""
+    start = time.perf_counter()
+    analytics = generate_analytics_from_filepaths(kind, [filepath])
+    number = sum(1 for _ in analytics)
+    return number, time.perf_counter() - start
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    month = generate_month(args.records, args.days)
+
+    print(f"{'kind':<11}{'file':<8}{'entries':>10}{'size (MB)':>11}"
+          f"{'read (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_fp = write_json(Path(tmp_dir) / "2024-08.json", month)
+        for kind in ("views", "downloads"):
+            columnar_fp = write_columnar(
+                Path(tmp_dir) / f"{kind}_2024-08.iac",
+                kind,
+                generate_analytics_from_filepaths(kind, [raw_fp]),
+            )
+            for name, filepath in (("json", raw_fp), ("iac", columnar_fp)):
+                number, seconds = measure(kind, filepath)
+                print(
+                    f"{kind:<11}{name:<8}{number:>10}"
+                    f"{filepath.stat().st_size / 1e6:>11.2f}{seconds:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Benchmark storage size vs. write/read cost of compressed analytics files.
+
+Usage:
+
+    python benchmarks/bench_compression.py [--records N] [--days N]
+
+A month of synthetic Matomo download + view analytics is generated. Like in
+real dumps, the same labels come back day after day.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from invenio_analytics_importer.compression import add_extension
+from invenio_analytics_importer.read import read_raw_analytics_from_filepaths
+from invenio_analytics_importer.write import write_json
+
+
+def generate_pid(rng):
+    """Generate an InvenioRDM-like pid."""
+    alphabet = "0123456789abcdefghjkmnpqrstvwxyz"
+    return (
+        "".join(rng.choice(alphabet) for _ in range(5))
+        + "-"
+        + "".join(rng.choice(alphabet) for _ in range(5))
+    )
+
+
+def generate_month(records, days, seed=42):
+    """Generate a month of raw analytics."""
+    rng = random.Random(seed)
+    pids = [generate_pid(rng) for _ in range(records)]
+    labels = []
+    for pid in pids:
+        labels.append(f"example.org/records/{pid}")
+        for i in range(rng.randint(0, 3)):
+            labels.append(
+                f"example.org/records/{pid}/files/data-{i}.csv?download=1"
+            )
+
+    month = {}
+    for day in range(1, days + 1):
+        entries = []
+        for label in rng.sample(labels, k=len(labels) // 2):
+            visits = rng.randint(1, 20)
+            entries.append(
+                {
+                    "avg_time_on_page": rng.randint(0, 600),
+                    "bounce_rate": f"{rng.randint(0, 100)}%",
+                    "exit_nb_visits": str(rng.randint(0, visits)),
+                    "label": label,
+                    "nb_hits": visits + rng.randint(0, 10),
+                    "nb_uniq_visitors": visits,
+                    "nb_visits": visits,
+                    "sum_time_spent": rng.randint(0, 10000),
+                }
+            )
+        month[f"2024-08-{day:02}"] = entries
+    return month
+
+
+def measure(filepath, month):
+    """Return (size, write seconds, read seconds) of month at filepath."""
+    start = time.perf_counter()
+    write_json(filepath, month)
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in read_raw_analytics_from_filepaths([filepath]):
+        pass
+    read_seconds = time.perf_counter() - start
+
+    return filepath.stat().st_size, write_seconds, read_seconds
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    month = generate_month(args.records, args.days)
+
+    print(f"{'compression':<12}{'size (MB)':>12}{'ratio':>8}"
+          f"{'write (s)':>12}{'read (s)':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline = None
+        for compression in (None, "gzip", "xz", "zstd"):
+            filepath = add_extension(
+                Path(tmp_dir) / "downloads_2024-08.json", compression
+            )
+            try:
+                size, write_seconds, read_seconds = measure(filepath, month)
+            except RuntimeError as e:  # zstd not installed
+                print(f"{compression:<12}{e}")
+                continue
+            baseline = baseline or size
+            print(
+                f"{compression or 'none':<12}{size / 1e6:>12.2f}"
+                f"{baseline / size:>8.1f}"
+                f"{write_seconds:>12.2f}{read_seconds:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Benchmark one-pass label parsing vs. the former regex-based functions.
+
+Usage:
+
+    python benchmarks/bench_labels.py [--labels N] [--records N]
+
+Labels are a mix of record pages, file downloads, file previews and other
+pages of a number of records, like in real dumps. The same labels come back
+(day after day), which a LabelCache takes advantage of.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from invenio_analytics_importer.convert import LabelCache, parse_label
+
+REGEX_PID = re.compile(r"/records/([^/]*)(?:/|$)")
+REGEX_DOWNLOAD = re.compile(r"\?download=1$")
+
+
+def regex_classify(label):
+    """Classify label as former generate_download_analytics did.
+
+    That is is_record + is_download, then DownloadAnalytics.create.
+    """
+    match = REGEX_PID.search(label)
+    if not (match and match.group(1)):
+        return None, None, None
+    if not REGEX_DOWNLOAD.search(label):
+        return "record", None, None
+    pid = REGEX_PID.search(label).group(1)
+    # Former DownloadAnalytics.create compiled this on every call
+    file_key = re.compile(r"/files/([^?]*)\?download=1").search(label)
+    return "download", pid, file_key.group(1)
+
+
+def generate_labels(n, records=10_000, seed=42):
+    """Generate n labels about given number of records."""
+    rng = random.Random(seed)
+    pids = [
+        f"{rng.randrange(10**5):05}-{rng.randrange(10**5):05}"
+        for _ in range(records)
+    ]
+    templates = [
+        "example.org/records/{pid}",
+        "example.org/records/{pid}/files/data-{i}.csv?download=1",
+        "example.org/records/{pid}/preview/data-{i}.csv",
+        "example.org/search?q=data-{i}",
+    ]
+    return [
+        rng.choice(templates).format(
+            pid=rng.choice(pids),
+            i=rng.randrange(5),
+        )
+        for _ in range(n)
+    ]
+
+
+def measure(classify, labels):
+    """Return seconds to classify all labels."""
+    start = time.perf_counter()
+    for label in labels:
+        classify(label)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=2_000_000)
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+
+    labels = generate_labels(args.labels, args.records)
+    label_cache = LabelCache()
+
+    regex_seconds = measure(regex_classify, labels)
+    print(f"{'regexes':<16}{regex_seconds:>8.2f} s")
+    for name, classify in (
+        ("parse_label", parse_label),
+        ("LabelCache", label_cache.parse),
+    ):
+        seconds = measure(classify, labels)
+        print(
+            f"{name:<16}{seconds:>8.2f} s"
+            f"{regex_seconds / seconds:>8.1f} x faster"
+        )
+    print(f"{'cache hit rate':<16}{label_cache.hit_rate:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Benchmark memory of materialized download analytics.
+
+Usage:
+
+    python benchmarks/bench_memory.py [--days N] [--records N]
+
+A period of synthetic download analytics is converted and held in a list,
+like ingest does. Plain dataclasses with their own strings (as
+DownloadAnalytics used to be) are compared with the slotted, interned
+DownloadAnalytics.
+"""
+
+import argparse
+import dataclasses
+import gc
+import random
+import tracemalloc
+
+from invenio_analytics_importer.convert import (
+    DownloadAnalytics,
+    generate_download_analytics,
+)
+
+
+@dataclasses.dataclass
+class PlainDownloadAnalytics:
+    """Former DownloadAnalytics."""
+
+    year_month_day: str
+    pid: str
+    file_key: str
+    visits: int
+    views: int
+
+
+def generate_raw_analytics(days, records, seed=42):
+    """Yield (YYYY-MM-DD, raw analytic) of downloads."""
+    rng = random.Random(seed)
+    pids = [f"{i:05}-{rng.randrange(10**5):05}" for i in range(records)]
+    for day in range(days):
+        year_month_day = f"2024-{day // 28 + 1:02}-{day % 28 + 1:02}"
+        for pid in rng.sample(pids, k=records // 2):
+            label = f"example.org/records/{pid}/files/data.csv?download=1"
+            # Like decoded JSON, each entry has its own strings
+            yield (
+                "".join(year_month_day),
+                {"label": "".join(label), "nb_hits": 2, "nb_visits": 1},
+            )
+
+
+def measure(convert, days, records):
+    """Return (number, bytes) of analytics materialized by convert."""
+    gc.collect()
+    tracemalloc.start()
+    analytics = list(convert(generate_raw_analytics(days, records)))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(analytics), size
+
+
+def convert_plain(raw_analytics):
+    """Convert to plain dataclasses."""
+    for analytic in generate_download_analytics(raw_analytics):
+        yield PlainDownloadAnalytics(
+            # Copies, like the former create did from its own regex matches
+            "".join(analytic.year_month_day),
+            "".join(analytic.pid),
+            "".join(analytic.file_key),
+            analytic.visits,
+            analytic.views,
+        )
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--records", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'representation':<24}{'entries':>10}{'MB':>8}{'B/entry':>9}")
+    for name, convert in (
+        ("plain dataclass", convert_plain),
+        (DownloadAnalytics.__name__, generate_download_analytics),
+    ):
+        number, size = measure(convert, args.days, args.records)
+        print(
+            f"{name:<24}{number:>10}{size / 1e6:>8.1f}"
+            f"{size / number:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
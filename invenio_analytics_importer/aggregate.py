@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Aggregate analytics targeting the same statistic.
+
+Different labels can be about the same record or file on the same day (other
+hostnames, trailing slashes, query strings...). Their analytics are merged,
+so that each statistic is ingested once with the sum of their counts.
+"""
+
+import dataclasses
+import hashlib
+import heapq
+import itertools
+import pickle
+import tempfile
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+
+def get_key(analytic):
+    """Return (year_month_day, pid[, file_key]) of analytic.
+
+    It determines the statistic the analytic ends up as.
+    """
+    file_key = getattr(analytic, "file_key", None)
+    if file_key is None:
+        return (analytic.year_month_day, analytic.pid)
+    return (analytic.year_month_day, analytic.pid, file_key)
+
+
+def get_partition(key, partitions, seed=0):
+    """Return partition of key (stable across processes).
+
+    Different seeds spread keys independently of each other.
+    """
+    digest = hashlib.blake2b(
+        "\0".join(key).encode(),
+        digest_size=8,
+        salt=seed.to_bytes(hashlib.blake2b.SALT_SIZE, "little"),
+    ).digest()
+    return int.from_bytes(digest, "little") % partitions
+
+
+def merge_into(merged, analytic):
+    """Merge analytic into merged ({key: analytic}) by summing counts."""
+    key = get_key(analytic)
+    current = merged.get(key)
+    if current is None:
+        # Copy so that the caller's analytics are left untouched
+        merged[key] = dataclasses.replace(analytic)
+    else:
+        current.views += analytic.views
+        current.visits += analytic.visits
+
+
+def iter_spilled(spill_file):
+    """Iterate over analytics spilled to file."""
+    spill_file.seek(0)
+    while True:
+        try:
+            yield pickle.load(spill_file)
+        except EOFError:
+            return
+
+
+def spill(merged, spill_files, seed=0):
+    """Append merged analytics to the spill file of their partition."""
+    for key, analytic in merged.items():
+        partition = get_partition(key, len(spill_files), seed)
+        spill_file = spill_files[partition]
+        pickle.dump(analytic, spill_file, pickle.HIGHEST_PROTOCOL)
+
+
+def aggregate_analytics(
+    analytics, max_entries=DEFAULT_MAX_ENTRIES, partitions=16, seed=0
+):
+    """Yield analytics merged by (year_month_day, pid[, file_key]).
+
+    Views and visits of merged analytics are summed. Analytics are merged in
+    a hash table of at most `max_entries`. When it's over, its entries are
+    spilled to temporary files partitioned by key, and each partition is
+    then aggregated the same way, partitioned again (with another seed) if
+    it's still too big. Without spilling, analytics are yielded in the order
+    their key was first seen.
+    """
+    # Otherwise, every partition would be spilled again, endlessly
+    if max_entries < 1:
+        raise ValueError(f"max_entries must be at least 1, not {max_entries}.")
+
+    merged = {}
+    spill_files = None
+
+    for analytic in analytics:
+        merge_into(merged, analytic)
+        if len(merged) > max_entries:
+            if spill_files is None:
+                spill_files = [
+                    tempfile.TemporaryFile() for _ in range(partitions)
+                ]
+            spill(merged, spill_files, seed)
+            merged = {}
+
+    if spill_files is None:
+        yield from merged.values()
+        return
+
+    try:
+        spill(merged, spill_files, seed)
+        del merged
+        for spill_file in spill_files:
+            yield from aggregate_analytics(
+                iter_spilled(spill_file), max_entries, partitions, seed + 1
+            )
+    finally:
+        for spill_file in spill_files:
+            spill_file.close()
+
+
+def aggregate_analytics_by_day(analytics, max_entries=DEFAULT_MAX_ENTRIES):
+    """Yield analytics merged by statistic, one day at a time.
+
+    Keys include the day, so each day is aggregated on its own (see
+    aggregate_analytics) and yielded as soon as the next day starts, instead
+    of after the whole input. Analytics of a day must be consecutive, as
+    they are within a file (days being unique across files): a day coming
+    back later raises ValueError, since its statistics were already yielded.
+    """
+    seen_days = set()
+    analytics_by_day = itertools.groupby(
+        analytics, key=lambda a: a.year_month_day
+    )
+    for day, analytics_of_day in analytics_by_day:
+        if day in seen_days:
+            raise ValueError(f"Analytics of {day} are in several places.")
+        seen_days.add(day)
+        yield from aggregate_analytics(analytics_of_day, max_entries)
+
+
+def merge_by_day(*analytics_streams):
+    """Yield analytics of day-ordered streams (e.g., of each kind) by day.
+
+    Analytics of the same day from all streams come together, so that a
+    record's views and downloads of a day are close to each other (e.g.,
+    looked up in the same window).
+    """
+    return heapq.merge(
+        *analytics_streams, key=lambda analytic: analytic.year_month_day
+    )
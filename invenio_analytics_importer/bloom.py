@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Bloom filter of strings.
+
+Tells in memory whether a string is definitely not in a set, or probably is
+(with a false positive rate of about `error_rate` up to `capacity` strings).
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bloom filter of strings, serializable to bytes."""
+
+    def __init__(self, capacity, error_rate=0.01, bits=None, count=0):
+        """Constructor.
+
+        :param bits: bytes. Bits of a serialized filter of same parameters.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = count
+        self.bits = bytearray(bits or (self.size + 7) // 8)
+
+    def _positions(self, value):
+        """Yield bit positions of value."""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        # Double hashing: positions are h1 + i * h2
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value):
+        """Add value."""
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        """Return if value was probably added."""
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def is_full(self):
+        """Return if more than capacity values were added."""
+        return self.count > self.capacity
@@ -8,25 +8,85 @@
 
 """Cache of data needed for ingestion work."""
 
+import array
+import itertools
+import sys
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
 from invenio_db import db
+from invenio_files_rest.models import FileInstance, ObjectVersion
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_rdm_records.records import RDMRecord
+from invenio_rdm_records.records.api import RDMFileRecord
 from invenio_search import current_search_client
 from invenio_search.engine import dsl
-from sqlalchemy import select
-
-
-def scan_records(record_cls, pids):
-    """Retrieve SE record."""
-    s = dsl.Search(
-        using=current_search_client,
-        index=record_cls.index.search_alias
+from sqlalchemy import and_, select
+from sqlalchemy.orm import aliased
+
+from invenio_analytics_importer.store import chunked
+
+# Fields of record documents needed to fill caches
+VIEWS_FIELDS = ["id", "parent.id"]
+DOWNLOADS_FIELDS = [
+    "id",
+    "uuid",
+    "parent.id",
+    "files.entries.key",
+    "files.entries.file_id",
+    "files.entries.size",
+]
+
+DEFAULT_SEARCH_CHUNK_SIZE = 1000
+DEFAULT_SEARCH_WORKERS = 4
+DEFAULT_DB_CHUNK_SIZE = 1000
+DEFAULT_WINDOW_SIZE = 10_000
+DEFAULT_MAX_RESOLVED = 100_000
+
+# pid type of records and parents
+PID_TYPE = "recid"
+
+
+def scan_records(record_cls, pids, fields=None):
+    """Retrieve SE records of pids.
+
+    pids are looked up in chunks (keeping terms clauses bounded) scanned
+    concurrently by a pool of threads. Only `fields` of the documents (all
+    if None) are retrieved.
+    """
+    config = current_app.config
+    chunk_size = config.get(
+        "ANALYTICS_IMPORTER_SEARCH_CHUNK_SIZE", DEFAULT_SEARCH_CHUNK_SIZE
     )
-
-    s = s.filter({"terms": {"id": pids}})
-
-    response = s.scan()
-
-    return response
+    workers = config.get(
+        "ANALYTICS_IMPORTER_SEARCH_WORKERS", DEFAULT_SEARCH_WORKERS
+    )
+    # The proxy is bound to the app context which threads don't have
+    client = current_search_client._get_current_object()
+    index = record_cls.index.search_alias
+
+    def scan_chunk(chunk):
+        """Return hits of chunk of pids."""
+        s = dsl.Search(using=client, index=index)
+        s = s.filter({"terms": {"id": chunk}})
+        if fields:
+            s = s.source(fields)
+        return list(s.scan())
+
+    pids = list(pids)
+    chunks = [
+        pids[i:i + chunk_size] for i in range(0, len(pids), chunk_size)
+    ]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from scan_chunk(chunk)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for hits in executor.map(scan_chunk, chunks):
+            yield from hits
 
 
 class Cache:
@@ -40,6 +100,15 @@ class Cache:
         self._file_id_to_size = {}
         self._pid_record_to_pid_parent = {}
 
+    def has_record(self, pid_of_record):
+        """Return if record is in cache."""
+        return self._pid_record_to_pid_parent.get(pid_of_record) is not None
+
+    def has_file(self, pid_of_record, file_key):
+        """Return if file of record is in cache."""
+        key = (pid_of_record, file_key)
+        return key in self._pid_record_and_file_key_to_file_id
+
     def get_file_id(self, pid_of_record, file_key):
         """Get file id."""
         return self._pid_record_and_file_key_to_file_id[(pid_of_record, file_key)]  # noqa
@@ -73,59 +142,463 @@ class Cache:
         self._pid_record_to_pid_parent[pid_of_record] = pid_of_parent
 
 
-def fill_downloads_cache(analytics):
-    """Fill and return a downloads cache."""
-    cache = Cache()
+def uuid_to_bytes(value):
+    """Return 16 bytes of UUID value (UUID or str)."""
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    return bytes.fromhex(value.replace("-", ""))
 
-    pids_set = set(a.pid for a in analytics)
 
-    record_cls = RDMRecord
-    uuid_to_pid = {}
+def bytes_to_uuid_str(value):
+    """Return canonical str of UUID of 16 bytes value."""
+    h = value.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
-    # Get and populate file_ids, size, and parent_id
-    results = scan_records(record_cls, list(pids_set))
-    for hit in results:
-        pid = hit["id"]
-        pid_of_parent = hit["parent"]["id"]
-        uuid = hit["uuid"]
 
-        cache.set_parent_pid(pid, pid_of_parent)
-        uuid_to_pid[uuid] = pid
+class CompactCache:
+    """Cache of system info in compact storage (same API as Cache).
 
-        entries = hit.get("files", {}).get("entries", [])
-        for e in entries:
-            key = e["key"]
-            file_id = e["file_id"]
-            size = e["size"]
+    Meant for repositories with millions of records or files. Pids are
+    interned and mapped to integer indices of columns. Bucket and file ids
+    (UUIDs) are kept as 16 bytes. File keys are nested per pid: most records
+    have a single file, which is kept as a (key, file index) pair.
 
-            cache.set_file_id(pid, key, file_id)
-            cache.set_size(file_id, size)
+    Files are stored per (pid, file key). Sizes are looked up right after
+    their file id (by ingestion or when filling), so the last file is
+    remembered; an index of file ids is only built for other lookups.
+    """
 
-    # Get and populate bucket id
-    stmt = select(
-        record_cls.model_cls.id,
-        record_cls.model_cls.bucket_id,
-    ).where(record_cls.model_cls.id.in_(list(uuid_to_pid.keys())))
+    def __init__(self):
+        """Constructor."""
+        self._pid_to_index = {}
+        self._parent_pids = []
+        self._bucket_ids = bytearray()
+        self._files = []
+        self._file_ids = bytearray()
+        self._sizes = array.array("q")
+        self._last_file = (None, None)
+        self._file_id_to_index = None
+
+    def _add_pid(self, pid):
+        """Return index of pid (added if new)."""
+        index = self._pid_to_index.get(pid)
+        if index is None:
+            index = len(self._parent_pids)
+            self._pid_to_index[sys.intern(pid)] = index
+            self._parent_pids.append(None)
+            self._bucket_ids += bytes(16)
+            self._files.append(None)
+        return index
+
+    def _add_file(self, file_id):
+        """Return index of newly added file_id."""
+        index = len(self._sizes)
+        uuid_bytes = uuid_to_bytes(file_id)
+        self._file_ids += uuid_bytes
+        self._sizes.append(0)
+        if self._file_id_to_index is not None:
+            self._file_id_to_index[uuid_bytes] = index
+        self._last_file = (str(file_id), index)
+        return index
+
+    def _get_file_index(self, file_id):
+        """Return index of file_id (or None)."""
+        last_file_id, index = self._last_file
+        if file_id == last_file_id:
+            return index
+
+        if self._file_id_to_index is None:
+            file_ids = self._file_ids
+            self._file_id_to_index = {
+                bytes(file_ids[16 * i:16 * i + 16]): i
+                for i in range(len(self._sizes))
+            }
+        return self._file_id_to_index.get(uuid_to_bytes(file_id))
+
+    def has_record(self, pid_of_record):
+        """Return if record is in cache."""
+        index = self._pid_to_index.get(pid_of_record)
+        return index is not None and self._parent_pids[index] is not None
+
+    def has_file(self, pid_of_record, file_key):
+        """Return if file of record is in cache."""
+        index = self._pid_to_index.get(pid_of_record)
+        if index is None:
+            return False
+        files = self._files[index]
+        if isinstance(files, tuple):
+            return files[0] == file_key
+        return files is not None and file_key in files
 
-    for uuid_of_record, bucket_id in db.session.execute(stmt):
-        pid = uuid_to_pid[str(uuid_of_record)]
-        cache.set_bucket_id(pid, bucket_id)
+    def get_file_id(self, pid_of_record, file_key):
+        """Get file id."""
+        files = self._files[self._pid_to_index[pid_of_record]]
+        if isinstance(files, tuple) and files[0] == file_key:
+            index = files[1]
+        elif isinstance(files, dict):
+            index = files[file_key]
+        else:
+            raise KeyError((pid_of_record, file_key))
+        file_id = bytes_to_uuid_str(self._file_ids[16 * index:16 * index + 16])
+        self._last_file = (file_id, index)
+        return file_id
 
-    return cache
+    def set_file_id(self, pid_of_record, file_key, file_id):
+        """Set file id."""
+        pid_index = self._add_pid(pid_of_record)
+        file_key = sys.intern(file_key)
+        file_index = self._add_file(file_id)
+        files = self._files[pid_index]
+        is_pair = isinstance(files, tuple)
+        if files is None or (is_pair and files[0] == file_key):
+            self._files[pid_index] = (file_key, file_index)
+        elif is_pair:
+            self._files[pid_index] = dict([files, (file_key, file_index)])
+        else:
+            files[file_key] = file_index
+
+    def get_bucket_id(self, pid_of_record):
+        """Get bucket id associated with record."""
+        index = self._pid_to_index[pid_of_record]
+        bucket_id = self._bucket_ids[16 * index:16 * index + 16]
+        if not any(bucket_id):
+            raise KeyError(pid_of_record)
+        return bytes_to_uuid_str(bucket_id)
 
+    def set_bucket_id(self, pid_of_record, bucket_id):
+        """Set bucket id associated with record."""
+        index = self._add_pid(pid_of_record)
+        self._bucket_ids[16 * index:16 * index + 16] = uuid_to_bytes(bucket_id)
 
-def fill_views_cache(analytics):
-    """Fill and return a views cache."""
-    cache = Cache()
+    def get_size(self, file_id):
+        """Get size in bytes of file."""
+        index = self._get_file_index(file_id)
+        return 0 if index is None else self._sizes[index]
+
+    def set_size(self, file_id, size):
+        """Set size in bytes of file."""
+        index = self._get_file_index(file_id)
+        if index is None:
+            index = self._add_file(file_id)
+        self._sizes[index] = size
 
-    pids_set = set(a.pid for a in analytics)
+    def get_parent_pid(self, pid_of_record):
+        """Get pid of parent of record."""
+        pid_of_parent = self._parent_pids[self._pid_to_index[pid_of_record]]
+        if pid_of_parent is None:
+            raise KeyError(pid_of_record)
+        return pid_of_parent
 
-    # Get and populate parent_id
+    def set_parent_pid(self, pid_of_record, pid_of_parent):
+        """Set pid of parent of record."""
+        index = self._add_pid(pid_of_record)
+        self._parent_pids[index] = sys.intern(pid_of_parent)
+
+
+def populate(cache, entries):
+    """Populate cache with entries ({pid: entry}, see store.py)."""
+    for pid, entry in entries.items():
+        cache.set_parent_pid(pid, entry["parent_pid"])
+        if entry.get("bucket_id") is not None:
+            cache.set_bucket_id(pid, entry["bucket_id"])
+        for key, file_id, size in entry.get("files", []):
+            cache.set_file_id(pid, key, file_id)
+            cache.set_size(file_id, size)
+
+
+def lookup_downloads_entries(pids):
+    """Return {pid: entry with files} looked up in OpenSearch/DB."""
     record_cls = RDMRecord
-    results = scan_records(record_cls, list(pids_set))
+    entries = {}
+    uuid_to_pid = {}
+
+    # Get file_ids, size, and parent_id
+    results = scan_records(record_cls, pids, DOWNLOADS_FIELDS)
     for hit in results:
         pid = hit["id"]
-        pid_of_parent = hit["parent"]["id"]
-        cache.set_parent_pid(pid, pid_of_parent)
+        uuid_to_pid[hit["uuid"]] = pid
+        entries[pid] = {
+            "parent_pid": hit["parent"]["id"],
+            "bucket_id": None,
+            "files": [
+                (e["key"], e["file_id"], e["size"])
+                for e in hit.get("files", {}).get("entries", [])
+            ],
+        }
+
+    # Get bucket id
+    model_cls = record_cls.model_cls
+    for chunk in chunked(uuid_to_pid, get_db_chunk_size()):
+        stmt = select(
+            model_cls.id,
+            model_cls.bucket_id,
+        ).where(model_cls.id.in_(chunk))
+
+        for uuid_of_record, bucket_id in db.session.execute(stmt):
+            pid = uuid_to_pid[str(uuid_of_record)]
+            entries[pid]["bucket_id"] = str(bucket_id)
+
+    return entries
+
+
+def lookup_views_entries(pids):
+    """Return {pid: entry} looked up in OpenSearch."""
+    results = scan_records(RDMRecord, pids, VIEWS_FIELDS)
+    return {hit["id"]: {"parent_pid": hit["parent"]["id"]} for hit in results}
+
+
+def get_db_chunk_size():
+    """Return number of values per IN clause of DB queries."""
+    return current_app.config.get(
+        "ANALYTICS_IMPORTER_DB_CHUNK_SIZE", DEFAULT_DB_CHUNK_SIZE
+    )
+
+
+def execute_streamed(stmt):
+    """Execute stmt, fetching rows in batches (server-side cursor)."""
+    return db.session.execute(
+        stmt, execution_options={"yield_per": get_db_chunk_size()}
+    )
 
+
+def select_records_from_db(pids):
+    """Yield (pid, uuid, pid of parent, bucket id) of records of pids."""
+    record_model = RDMRecord.model_cls
+    record_pid = aliased(PersistentIdentifier)
+    parent_pid = aliased(PersistentIdentifier)
+
+    for chunk in chunked(pids, get_db_chunk_size()):
+        stmt = (
+            select(
+                record_pid.pid_value,
+                record_model.id,
+                parent_pid.pid_value,
+                record_model.bucket_id,
+            )
+            .join(record_model, record_model.id == record_pid.object_uuid)
+            .join(
+                parent_pid,
+                and_(
+                    parent_pid.object_uuid == record_model.parent_id,
+                    parent_pid.pid_type == PID_TYPE,
+                ),
+            )
+            .where(
+                record_pid.pid_type == PID_TYPE,
+                record_pid.status == PIDStatus.REGISTERED,
+                record_pid.pid_value.in_(chunk),
+            )
+        )
+        yield from execute_streamed(stmt)
+
+
+def select_files_from_db(record_uuids):
+    """Yield (record uuid, file key, file id, size) of files of records."""
+    file_model = RDMFileRecord.model_cls
+
+    for chunk in chunked(record_uuids, get_db_chunk_size()):
+        stmt = (
+            select(
+                file_model.record_id,
+                file_model.key,
+                ObjectVersion.file_id,
+                FileInstance.size,
+            )
+            .join(
+                ObjectVersion,
+                ObjectVersion.version_id == file_model.object_version_id,
+            )
+            .join(FileInstance, FileInstance.id == ObjectVersion.file_id)
+            .where(file_model.record_id.in_(chunk))
+        )
+        yield from execute_streamed(stmt)
+
+
+def lookup_downloads_entries_from_db(pids):
+    """Return {pid: entry with files} looked up in DB only."""
+    entries = {}
+    uuid_to_pid = {}
+    for pid, uuid, pid_of_parent, bucket_id in select_records_from_db(pids):
+        uuid_to_pid[uuid] = pid
+        entries[pid] = {
+            "parent_pid": pid_of_parent,
+            "bucket_id": str(bucket_id) if bucket_id else None,
+            "files": [],
+        }
+
+    for uuid, key, file_id, size in select_files_from_db(uuid_to_pid):
+        entries[uuid_to_pid[uuid]]["files"].append((key, str(file_id), size))
+
+    return entries
+
+
+def lookup_views_entries_from_db(pids):
+    """Return {pid: entry} looked up in DB only."""
+    return {
+        pid: {"parent_pid": pid_of_parent}
+        for pid, _, pid_of_parent, _ in select_records_from_db(pids)
+    }
+
+
+LOOKUPS = {
+    ("views", "search"): lookup_views_entries,
+    ("views", "db"): lookup_views_entries_from_db,
+    ("downloads", "search"): lookup_downloads_entries,
+    ("downloads", "db"): lookup_downloads_entries_from_db,
+}
+
+
+def resolve_entries(pids, lookup_entries, store=None, with_files=False):
+    """Return {pid: entry} of pids found in the repository.
+
+    With a (persistent) store, only pids missing from it or expired are
+    looked up, and what was looked up is saved to it. Pids known to be
+    missing from the repository are not looked up, and pids that turn out to
+    be missing are saved as such.
+    """
+    pids_set = set(pids)
+    entries = {}
+
+    if store is not None:
+        entries.update(store.load(pids_set, with_files=with_files))
+        pids_set -= entries.keys()
+        pids_set -= store.load_missing(pids_set)
+
+    if pids_set:
+        looked_up = lookup_entries(pids_set)
+        entries.update(looked_up)
+        if store is not None:
+            store.save(looked_up, with_files=with_files)
+            store.save_missing(pids_set - looked_up.keys())
+
+    return entries
+
+
+def fill_cache(
+    analytics, lookup_entries, store=None, with_files=False, cache_cls=Cache
+):
+    """Fill and return a cache (of class cache_cls) for analytics.
+
+    See resolve_entries for the use of store.
+    """
+    cache = cache_cls()
+    pids = set(a.pid for a in analytics)
+    populate(cache, resolve_entries(pids, lookup_entries, store, with_files))
     return cache
+
+
+def iter_windows(
+    analytics,
+    lookup_entries,
+    store=None,
+    with_files=False,
+    cache_cls=Cache,
+    window_size=DEFAULT_WINDOW_SIZE,
+    max_resolved=DEFAULT_MAX_RESOLVED,
+):
+    """Yield (window of analytics, cache of their records) as analytics go.
+
+    Unlike fill_cache, analytics are consumed `window_size` at a time, and
+    the pids of each window are resolved in one batch before it's yielded.
+    So, stats can be generated from the first window on, and memory is
+    bounded by the size of a window and of the `max_resolved` most recently
+    used entries (or pids known to be missing) kept across windows.
+    The cache of a window (of class cache_cls) only holds its records.
+    """
+    resolved = OrderedDict()
+    analytics = iter(analytics)
+
+    while True:
+        window = list(itertools.islice(analytics, window_size))
+        if not window:
+            return
+
+        pids = set(a.pid for a in window)
+        for pid in pids & resolved.keys():
+            resolved.move_to_end(pid)
+        new_pids = pids - resolved.keys()
+        if new_pids:
+            entries = resolve_entries(
+                new_pids, lookup_entries, store, with_files
+            )
+            for pid in new_pids:
+                resolved[pid] = entries.get(pid)
+
+        cache = cache_cls()
+        populate(
+            cache,
+            {pid: resolved[pid] for pid in pids if resolved[pid] is not None},
+        )
+        # Only evict now: entries of the window are needed above
+        while len(resolved) > max_resolved:
+            resolved.popitem(last=False)
+
+        yield window, cache
+
+
+def get_lookup(kind, backend="search"):
+    """Return (lookup_entries, with_files) to fill a cache for kind.
+
+    :param kind: str. "views", "downloads" or "all" (views and downloads).
+        Entries with files also serve views, so "all" resolves each record
+        once for both.
+    :param backend: str. "search" (OpenSearch + DB) or "db" (DB only).
+    """
+    with_files = kind in ("downloads", "all")
+    lookup_kind = "downloads" if with_files else "views"
+    return LOOKUPS[(lookup_kind, backend)], with_files
+
+
+def fill_cache_of_kind(
+    kind, analytics, store=None, backend="search", cache_cls=Cache
+):
+    """Fill and return a cache for analytics of kind (see get_lookup)."""
+    lookup_entries, with_files = get_lookup(kind, backend)
+    return fill_cache(
+        analytics, lookup_entries, store, with_files, cache_cls=cache_cls
+    )
+
+
+def fill_downloads_cache(
+    analytics, store=None, backend="search", cache_cls=Cache
+):
+    """Fill and return a downloads cache."""
+    return fill_cache_of_kind(
+        "downloads", analytics, store, backend, cache_cls
+    )
+
+
+def fill_views_cache(analytics, store=None, backend="search", cache_cls=Cache):
+    """Fill and return a views cache."""
+    return fill_cache_of_kind("views", analytics, store, backend, cache_cls)
+
+
+def iter_windows_of_kind(
+    kind, analytics, store=None, backend="search", cache_cls=Cache, **kwargs
+):
+    """Yield (window of analytics, cache) for analytics of kind.
+
+    See get_lookup for kind and iter_windows for kwargs.
+    """
+    lookup_entries, with_files = get_lookup(kind, backend)
+    return iter_windows(
+        analytics,
+        lookup_entries,
+        store,
+        with_files,
+        cache_cls=cache_cls,
+        **kwargs,
+    )
+
+
+def get_window_options():
+    """Return keyword arguments of iter_windows as configured."""
+    config = current_app.config
+    return {
+        "window_size": config.get(
+            "ANALYTICS_IMPORTER_LOOKUP_WINDOW_SIZE", DEFAULT_WINDOW_SIZE
+        ),
+        "max_resolved": config.get(
+            "ANALYTICS_IMPORTER_LOOKUP_MAX_RESOLVED", DEFAULT_MAX_RESOLVED
+        ),
+    }
@@ -14,23 +14,40 @@ from pathlib import Path
 import click
 import flask
 
+from invenio_analytics_importer.aggregate import (
+    DEFAULT_MAX_ENTRIES,
+    aggregate_analytics_by_day,
+    merge_by_day,
+)
 from invenio_analytics_importer.cache import (
-    fill_downloads_cache,
-    fill_views_cache,
+    Cache,
+    CompactCache,
+    get_window_options,
+    iter_windows_of_kind,
 )
+from invenio_analytics_importer.columnar import is_columnar, write_columnar
+from invenio_analytics_importer.compression import EXTENSION_BY_COMPRESSION
 from invenio_analytics_importer.convert import (
-    generate_download_analytics,
-    generate_view_analytics,
+    DEFAULT_LABEL_CACHE_SIZE,
+    LabelCache,
+    generate_analytics_from_filepath,
+    generate_analytics_from_filepaths,
 )
 from invenio_analytics_importer.ingest import (
     generate_download_stats,
+    generate_stats,
     generate_view_stats,
+    generate_windowed_stats,
+    get_bulk_options,
     ingest_statistics,
 )
-from invenio_analytics_importer.read import read_raw_analytics_from_filepaths
+from invenio_analytics_importer.manifest import Manifest
+from invenio_analytics_importer.read import read_raw_analytics
 from invenio_analytics_importer.retrieve import (
     retrieve_period_analytics,
 )
+from invenio_analytics_importer.store import get_lookup_store
+from invenio_analytics_importer.write import write_raw_analytics
 
 
 @click.group()
@@ -42,29 +59,24 @@ def analytics():
 @analytics.command()
 @click.option(
     "--views",
-    "kind",
-    flag_value="views",
-    default="views",
+    is_flag=True,
     help="Retrieve views.",
 )
 @click.option(
     "--downloads",
-    "kind",
-    flag_value="downloads",
+    is_flag=True,
     help="Retrieve downloads.",
 )
 @click.option(
     "--from",
     "-f",
     "year_month_from",
-    required=True,
     help="Download analytics from this month (inclusive).",
 )
 @click.option(
     "--to",
     "-t",
     "year_month_to",
-    required=True,
     help="Download analytics to this month (inclusive).",
 )
 @click.option(
@@ -74,21 +86,151 @@ def analytics():
     required=True,
     help="Place resulting analytics file in this directory.",
 )
-def retrieve(kind, year_month_from, year_month_to, output_dir):
+@click.option(
+    "--days-per-request",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Fetch this many consecutive days per request (31 for a month).",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=31,
+    show_default=True,
+    help="Maximum number of requests in flight across the whole period.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write files without indentation.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(list(EXTENSION_BY_COMPRESSION)),
+    default=None,
+    help="Compress written files (extension is added accordingly).",
+)
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    show_default=True,
+    help="Format of written files (ndjson can be read lazily).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Only retrieve days missing or stale in the output directory.",
+)
+@click.option(
+    "--since-last",
+    is_flag=True,
+    help="Like --resume, from the last retrieval up to the current month.",
+)
+@click.option(
+    "--slim",
+    is_flag=True,
+    help="Only keep records' entries and the fields needed for ingestion.",
+)
+def retrieve(
+    views,
+    downloads,
+    year_month_from,
+    year_month_to,
+    output_dir,
+    days_per_request,
+    concurrency,
+    compact,
+    compression,
+    file_format,
+    resume,
+    since_last,
+    slim,
+):
     """Retrieve analytics from the web.
 
-    For 'kind' the last --views/--downloads takes precedence.
+    If neither --views nor --downloads is passed, views are retrieved.
+
+    Retrieved days are recorded in a manifest in the output directory. It
+    allows --resume and --since-last to only retrieve what's left.
     """
+    kinds = [
+        kind
+        for kind, selected in (("views", views), ("downloads", downloads))
+        if selected
+    ] or ["views"]
+
+    if since_last:
+        resume = True
+        period = Manifest.load(output_dir).get_since_last_period(kinds)
+        if period is None:
+            raise click.UsageError(
+                "Nothing retrieved yet in output directory. Use --from/--to."
+            )
+        year_month_from = year_month_from or period[0]
+        year_month_to = year_month_to or period[1]
+    elif not (year_month_from and year_month_to):
+        raise click.UsageError("--from and --to are required.")
+
     asyncio.run(
         retrieve_period_analytics(
             provider="matomo",  # hardcoded for now
-            kind=kind,
+            kinds=kinds,
             period=(year_month_from, year_month_to),
             output_dir=output_dir,
+            concurrency=concurrency,
+            days_per_request=days_per_request,
+            compact=compact,
+            compression=compression,
+            resume=resume,
+            slim=slim,
+            file_format=file_format,
         )
     )
 
 
+@analytics.command()
+@click.option(
+    "--views",
+    "kind",
+    flag_value="views",
+    default="views",
+    help="Convert views (only matters for columnar output).",
+)
+@click.option(
+    "--downloads",
+    "kind",
+    flag_value="downloads",
+    help="Convert downloads (only matters for columnar output).",
+)
+@click.argument(
+    "input_filepath", type=click.Path(exists=True, path_type=Path)
+)
+@click.argument("output_filepath", type=click.Path(path_type=Path))
+def convert(kind, input_filepath, output_filepath):
+    """Convert analytics file to another format.
+
+    Formats (and compressions) are based on extensions, e.g.,
+    `convert views_2024-08.json views_2024-08.ndjson.gz`.
+
+    With a .iac output, analytics of kind are converted once and for all to
+    a columnar file that ingest reads without any parsing, e.g.,
+    `convert --downloads downloads_2024-08.json downloads_2024-08.iac`.
+    """
+    if is_columnar(output_filepath):
+        write_columnar(
+            output_filepath,
+            kind,
+            generate_analytics_from_filepath(kind, input_filepath),
+        )
+    else:
+        write_raw_analytics(
+            output_filepath, read_raw_analytics(input_filepath)
+        )
+
+
 @analytics.command()
 @click.option(
     "--views",
@@ -103,44 +245,163 @@ def retrieve(kind, year_month_from, year_month_to, output_dir):
     flag_value="downloads",
     help="Retrieve downloads.",
 )
+@click.option(
+    "--all",
+    "kind",
+    flag_value="all",
+    help=(
+        "Ingest views and downloads together, looking up each record once "
+        "(use --views-filepath and --downloads-filepath)."
+    ),
+)
 @click.option(
     "-f", "--filepath", type=click.Path(exists=True, path_type=Path),
     multiple=True
 )
-def ingest(kind, filepath):
+@click.option(
+    "--views-filepath",
+    type=click.Path(exists=True, path_type=Path),
+    multiple=True,
+    help="Views file (with --all).",
+)
+@click.option(
+    "--downloads-filepath",
+    type=click.Path(exists=True, path_type=Path),
+    multiple=True,
+    help="Downloads file (with --all).",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Read and convert files with this many processes.",
+)
+@click.option(
+    "--label-cache-size",
+    type=click.IntRange(min=0),
+    default=DEFAULT_LABEL_CACHE_SIZE,
+    show_default=True,
+    help="Keep this many parsed labels (per process) to avoid parsing again.",
+)
+@click.option(
+    "--lookup-backend",
+    type=click.Choice(["search", "db"]),
+    default=None,
+    help=(
+        "Look up record metadata in OpenSearch (search) or in the DB only "
+        "(db). Defaults to ANALYTICS_IMPORTER_LOOKUP_BACKEND."
+    ),
+)
+def ingest(
+    kind,
+    filepath,
+    views_filepath,
+    downloads_filepath,
+    workers,
+    label_cache_size,
+    lookup_backend,
+):
     """Ingest stats from given filepaths into your RDM instance."""
     # filepath is actually a list of filepaths
-    filepaths = filepath
-
-    # Raw read is same across views/downloads
-    raw_analytics = read_raw_analytics_from_filepaths(filepaths)
-
-    # Convert raw analytics to processed analytics
-    if kind == "views":
-        iter_analytics = generate_view_analytics(raw_analytics)
-    elif kind == "downloads":
-        iter_analytics = generate_download_analytics(raw_analytics)
+    if kind == "all":
+        if filepath:
+            raise click.UsageError(
+                "With --all, pass --views-filepath/--downloads-filepath."
+            )
+        filepaths_by_kind = {
+            "views": views_filepath,
+            "downloads": downloads_filepath,
+        }
     else:
-        exit(1)
+        if views_filepath or downloads_filepath:
+            raise click.UsageError(
+                "--views-filepath/--downloads-filepath require --all."
+            )
+        filepaths_by_kind = {kind: filepath}
+
+    # Files are read and converted only once: the converted analytics are
+    # much smaller than the raw ones. Analytics ending up as the same
+    # statistic are merged, so each statistic is ingested once. Days are
+    # merged one at a time, so analytics stream on to lookup and ingestion.
+    label_cache = LabelCache(label_cache_size)
+    max_entries = flask.current_app.config.get(
+        "ANALYTICS_IMPORTER_AGGREGATE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES
+    )
+    # With both kinds, days of each are interleaved, so that a record's views
+    # and downloads of a day are looked up together
+    analytics = merge_by_day(
+        *(
+            aggregate_analytics_by_day(
+                generate_analytics_from_filepaths(
+                    kind_of_files, filepaths, workers, label_cache
+                ),
+                max_entries=max_entries,
+            )
+            for kind_of_files, filepaths in filepaths_by_kind.items()
+        )
+    )
 
-    # Prepare cache
-    raw_analytics_for_cache = read_raw_analytics_from_filepaths(filepaths)
-    if kind == "views":
-        iter_analytics_for_cache = generate_view_analytics(
-            raw_analytics_for_cache
+    # Metadata looked up in previous runs is reused if configured
+    store = get_lookup_store()
+    backend = lookup_backend or flask.current_app.config.get(
+        "ANALYTICS_IMPORTER_LOOKUP_BACKEND", "search"
+    )
+    compact = flask.current_app.config.get(
+        "ANALYTICS_IMPORTER_COMPACT_CACHE", False
+    )
+    cache_cls = CompactCache if compact else Cache
+    # Records are looked up window by window as stats are ingested, so that
+    # ingestion starts right away and memory stays bounded
+    window_options = get_window_options()
+    generate_stats_of_kind = {
+        "views": generate_view_stats,
+        "downloads": generate_download_stats,
+        "all": generate_stats,
+    }[kind]
+    try:
+        windows = iter_windows_of_kind(
+            kind, analytics, store, backend, cache_cls, **window_options
         )
-        cache = fill_views_cache(iter_analytics_for_cache)
-    elif kind == "downloads":
-        iter_analytics_for_cache = generate_download_analytics(
-            raw_analytics_for_cache
+        # ingest is same across kind
+        ingested = ingest_statistics(
+            generate_windowed_stats(windows, generate_stats_of_kind),
+            **get_bulk_options(),
         )
-        cache = fill_downloads_cache(iter_analytics_for_cache)
+    finally:
+        if store is not None:
+            store.close()
+
+    print(f"Ingested statistics: {ingested}")
+    print(f"Label cache hit rate: {label_cache.hit_rate:.1%}")
+
+
+@analytics.command()
+@click.option(
+    "--pid",
+    "pids",
+    multiple=True,
+    help="Invalidate this record's entry (repeatable).",
+)
+@click.option(
+    "--all",
+    "invalidate_all",
+    is_flag=True,
+    help="Invalidate all entries.",
+)
+def invalidate(pids, invalidate_all):
+    """Invalidate entries of the persistent lookup cache.
+
+    Their metadata is looked up again at the next ingest.
+    """
+    if not (pids or invalidate_all):
+        raise click.UsageError("Pass --pid or --all.")
 
-    # Convert to ingestable
-    if kind == "views":
-        stats_for_ingest = generate_view_stats(iter_analytics, cache)
-    elif kind == "downloads":
-        stats_for_ingest = generate_download_stats(iter_analytics, cache)
+    store = get_lookup_store()
+    if store is None:
+        raise click.UsageError("ANALYTICS_IMPORTER_CACHE_DIR is not set.")
 
-    # ingest is same across kind
-    ingest_statistics(stats_for_ingest)
+    try:
+        store.invalidate(None if invalidate_all else pids)
+    finally:
+        store.close()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Columnar binary format of converted analytics (.iac).
+
+Converted analytics are stored so that they can be read again without any
+parsing:
+
+- magic (b"IAC1") and header size (uint32)
+- header: JSON of kind, number of rows and dictionaries of days, pids (and
+  file keys), padded to 8 bytes
+- columns: one little-endian array per field. Strings are indices (uint32)
+  into their dictionary, counts are int64.
+
+Files are memory-mapped for reading: only what is iterated over is paged in.
+"""
+
+import array
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+COLUMNAR_EXTENSION = ".iac"
+MAGIC = b"IAC1"
+PREAMBLE = struct.Struct("<4sI")
+
+# (field, array typecode, is dictionary-encoded) of each kind in the order
+# of the fields of its analytics
+COLUMNS_BY_KIND = {
+    "views": (
+        ("year_month_day", "I", True),
+        ("pid", "I", True),
+        ("visits", "q", False),
+        ("views", "q", False),
+    ),
+    "downloads": (
+        ("year_month_day", "I", True),
+        ("pid", "I", True),
+        ("file_key", "I", True),
+        ("visits", "q", False),
+        ("views", "q", False),
+    ),
+}
+
+
+def is_columnar(filepath):
+    """Return if filepath is in columnar format (based on its extension)."""
+    return Path(filepath).suffix == COLUMNAR_EXTENSION
+
+
+def _to_little_endian(column):
+    """Return column (array) in little-endian byte order."""
+    if sys.byteorder == "big":
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def write_columnar(filepath, kind, analytics):
+    """Write analytics of kind to filepath in columnar format."""
+    columns = COLUMNS_BY_KIND[kind]
+    arrays = [array.array(typecode) for _, typecode, _ in columns]
+    dictionaries = {
+        field: {} for field, _, encoded in columns if encoded
+    }
+    rows = 0
+
+    for analytic in analytics:
+        for (field, _, encoded), column in zip(columns, arrays):
+            value = getattr(analytic, field)
+            if encoded:
+                dictionary = dictionaries[field]
+                value = dictionary.setdefault(value, len(dictionary))
+            column.append(value)
+        rows += 1
+
+    header = json.dumps(
+        {
+            "kind": kind,
+            "rows": rows,
+            # dicts keep insertion order: values are in order of index
+            "dictionaries": {
+                field: list(dictionary)
+                for field, dictionary in dictionaries.items()
+            },
+        },
+        separators=(",", ":"),
+    ).encode()
+    # Pad so that columns are aligned
+    header += b" " * (-(PREAMBLE.size + len(header)) % 8)
+
+    with open(filepath, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        for column in arrays:
+            f.write(_to_little_endian(column).tobytes())
+    return filepath
+
+
+def _read_column(buffer, offset, typecode, rows):
+    """Return column of rows at offset of buffer (and offset after it)."""
+    size = array.array(typecode).itemsize * rows
+    column = buffer[offset:offset + size]
+    if sys.byteorder == "big":
+        column = _to_little_endian(array.array(typecode, column.tobytes()))
+    else:
+        column = column.cast(typecode)
+    return column, offset + size
+
+
+def read_columnar(filepath):
+    """Return (kind, iterator of rows) of columnar filepath.
+
+    Rows are tuples of the fields of the kind's analytics, in order.
+    """
+    with open(filepath, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, header_size = None, 0
+    if len(mapped) >= PREAMBLE.size:
+        magic, header_size = PREAMBLE.unpack_from(mapped)
+    if magic != MAGIC:
+        mapped.close()
+        raise ValueError(f"{filepath} is not in columnar format.")
+    offset = PREAMBLE.size
+    header = json.loads(mapped[offset:offset + header_size])
+    offset += header_size
+
+    return header["kind"], _iter_rows(mapped, offset, header)
+
+
+def _iter_rows(mapped, offset, header):
+    """Iterate over rows of mapped columnar file.
+
+    The mapping is closed once rows (and their columns) are garbage.
+    """
+    buffer = memoryview(mapped)
+    rows = header["rows"]
+    columns = []
+    for field, typecode, encoded in COLUMNS_BY_KIND[header["kind"]]:
+        column, offset = _read_column(buffer, offset, typecode, rows)
+        if encoded:
+            # Strings of a dictionary are shared by all rows
+            dictionary = [
+                sys.intern(value) for value in header["dictionaries"][field]
+            ]
+            column = map(dictionary.__getitem__, column)
+        columns.append(column)
+    yield from zip(*columns)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Transparently (de)compressed files.
+
+Compression is determined by the file extension.
+"""
+
+import gzip
+import lzma
+from pathlib import Path
+
+EXTENSION_BY_COMPRESSION = {
+    "gzip": ".gz",
+    "xz": ".xz",
+    "zstd": ".zst",
+}
+
+COMPRESSION_BY_EXTENSION = {
+    e: c for c, e in EXTENSION_BY_COMPRESSION.items()
+}
+
+
+def get_compression(filepath):
+    """Return compression of filepath based on its extension (or None)."""
+    return COMPRESSION_BY_EXTENSION.get(Path(filepath).suffix)
+
+
+def add_extension(filepath, compression):
+    """Return filepath with the extension of compression (if any) added."""
+    if not compression:
+        return filepath
+    return filepath.with_name(
+        filepath.name + EXTENSION_BY_COMPRESSION[compression]
+    )
+
+
+def remove_extension(filepath):
+    """Return filepath without the extension of its compression (if any)."""
+    filepath = Path(filepath)
+    if get_compression(filepath) is None:
+        return filepath
+    return filepath.with_suffix("")
+
+
+def _import_zstd():
+    """Import zstd module (stdlib from Python 3.14, backport before)."""
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError:
+            raise RuntimeError(
+                "zstd compression requires "
+                "`pip install invenio-analytics-importer[zstd]`."
+            )
+    return zstd
+
+
+def open_text(filepath, mode="r", compression="infer"):
+    """Open filepath in text mode, (de)compressing it as needed.
+
+    :param mode: str. "r" or "w".
+    :param compression: str. "infer" (from extension), None, "gzip", "xz" or
+        "zstd".
+    """
+    if compression == "infer":
+        compression = get_compression(filepath)
+
+    if compression is None:
+        return open(filepath, mode)
+    elif compression == "gzip":
+        return gzip.open(filepath, mode + "t")
+    elif compression == "xz":
+        return lzma.open(filepath, mode + "t")
+    elif compression == "zstd":
+        return _import_zstd().open(filepath, mode + "t")
+
+    raise ValueError(f"Unknown compression: {compression}")
@@ -16,3 +16,110 @@ ANALYTICS_IMPORTER_MATOMO_SITE_ID = ""
 
 ANALYTICS_IMPORTER_MATOMO_TOKEN = ""
 """A Matamoto application token."""
+
+ANALYTICS_IMPORTER_MATOMO_TIMEOUT = 60
+"""Timeout in seconds of requests to Matomo."""
+
+ANALYTICS_IMPORTER_MATOMO_ATTEMPTS = 5
+"""Attempts per request to Matomo on transient errors (429, 5xx, timeouts).
+
+Attempts are separated by exponential backoff with jitter.
+"""
+
+ANALYTICS_IMPORTER_MATOMO_RATE_LIMIT = None
+"""Maximum average number of requests per second to Matomo (None: no limit).
+
+On top of it, concurrency adapts itself to Matomo's responsiveness.
+"""
+
+ANALYTICS_IMPORTER_MATOMO_FILTER_PATTERN = ""
+"""Only retrieve labels matching this regex (filtered by Matomo).
+
+e.g., "/records/" skips search pages, static assets, etc. that are never
+ingested anyway.
+"""
+
+ANALYTICS_IMPORTER_MATOMO_PAGE_SIZE = 0
+"""Rows per request to Matomo. Bigger days are paginated (0: no pagination)."""
+
+ANALYTICS_IMPORTER_RESPONSE_CACHE_DIR = None
+"""Directory of the on-disk cache of Matomo responses (None: no cache)."""
+
+ANALYTICS_IMPORTER_RESPONSE_CACHE_MAX_SIZE = 10 * 2**30
+"""Size in bytes above which least recently used responses are evicted."""
+
+ANALYTICS_IMPORTER_RESPONSE_CACHE_MIN_AGE_DAYS = 2
+"""Only cache days at least this old. More recent days are always refetched."""
+
+ANALYTICS_IMPORTER_AGGREGATE_MAX_ENTRIES = 1_000_000
+"""Merge analytics of the same statistic in memory up to this many entries.
+
+Beyond, entries are spilled to temporary files and merged per partition
+(partitioned again while still bigger than this).
+"""
+
+ANALYTICS_IMPORTER_LOOKUP_BACKEND = "search"
+"""Where record metadata is looked up at ingestion.
+
+"search" (OpenSearch, plus the DB for bucket ids) or "db" (DB only, e.g.,
+while the search cluster is busy or being reindexed).
+"""
+
+ANALYTICS_IMPORTER_COMPACT_CACHE = False
+"""Keep the looked up record metadata of each window in compact storage.
+
+Only the records of a window (see below) are held so, which saves little:
+memory at ingestion is bounded by ANALYTICS_IMPORTER_LOOKUP_WINDOW_SIZE and
+ANALYTICS_IMPORTER_LOOKUP_MAX_RESOLVED, so lower those instead.
+"""
+
+ANALYTICS_IMPORTER_LOOKUP_WINDOW_SIZE = 10_000
+"""Look up records of analytics by windows of this many analytics.
+
+Stats of a window are ingested as soon as its records are looked up.
+"""
+
+ANALYTICS_IMPORTER_LOOKUP_MAX_RESOLVED = 100_000
+"""Keep this many looked up records (most recently used) across windows."""
+
+ANALYTICS_IMPORTER_DB_CHUNK_SIZE = 1000
+"""Values per IN clause (and rows per fetch) of DB lookups."""
+
+ANALYTICS_IMPORTER_SEARCH_CHUNK_SIZE = 1000
+"""Look up records in OpenSearch by chunks of this many pids."""
+
+ANALYTICS_IMPORTER_SEARCH_WORKERS = 4
+"""Number of chunks of pids looked up in OpenSearch concurrently."""
+
+ANALYTICS_IMPORTER_CACHE_DIR = None
+"""Directory of the persistent lookup cache (None: no persistent cache).
+
+Record metadata needed for ingestion (parent pids, bucket ids, file ids and
+sizes) is kept there across runs.
+"""
+
+ANALYTICS_IMPORTER_CACHE_TTL = 30 * 24 * 60 * 60
+"""Seconds after which an entry of the persistent lookup cache is refreshed."""
+
+ANALYTICS_IMPORTER_CACHE_MISSING_TTL = 7 * 24 * 60 * 60
+"""Seconds during which pids not found in the repository aren't looked up.
+
+Shorter than ANALYTICS_IMPORTER_CACHE_TTL, since a pid could be published in
+the meantime (e.g., its draft was previewed).
+"""
+
+ANALYTICS_IMPORTER_BULK_CHUNK_SIZE = 500
+"""Statistics per bulk indexing request (initial size if adaptive)."""
+
+ANALYTICS_IMPORTER_BULK_MAX_CHUNK_BYTES = 10 * 2**20
+"""Maximum size in bytes of a bulk indexing request."""
+
+ANALYTICS_IMPORTER_BULK_THREADS = 1
+"""Bulk indexing requests sent concurrently."""
+
+ANALYTICS_IMPORTER_BULK_ADAPTIVE = False
+"""Adjust sizes of bulk indexing requests while ingesting.
+
+Sizes grow while requests are fast, and are halved when one is slow or has
+statistics rejected by an overloaded cluster (which are retried).
+"""
@@ -11,18 +11,101 @@
 WARNING: all of the below assumes Matomo output for now.
 """
 
+import collections
 import dataclasses
+import functools
+import itertools
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
 
-REGEX_PID = re.compile(r"/records/([^/]*)(?:/|$)")
-REGEX_DOWNLOAD = re.compile(r"\?download=1$")
+from invenio_analytics_importer.columnar import is_columnar, read_columnar
+from invenio_analytics_importer.read import read_raw_analytics
+
+# "<host>/records/<pid>[/files/<key>][...][?<query>][#...]"
+REGEX_LABEL = re.compile(
+    r"/records/(?P<pid>[^/?#]+)(?:/files/(?P<key>[^?#]+))?[^?#]*"
+    r"(?:\?(?P<query>[^#]*))?"
+)
+DOWNLOAD_PARAM = "download=1"
+NOT_A_RECORD = (None, None, None)
+DEFAULT_LABEL_CACHE_SIZE = 2**18
+# Files converted (or being converted) ahead of the one being yielded, per
+# worker
+LOOKAHEAD_FACTOR = 2
+
+
+def has_download_param(query):
+    """Return if query string has download=1 (among other params)."""
+    return DOWNLOAD_PARAM in query.split("&")
+
+
+def parse_label(label):
+    """Parse label in a single pass.
+
+    Return (kind, pid, file_key) where kind is:
+
+    - "download" for "<host>/records/<pid>/files/<key>?[...&]download=1[...]"
+      (file_key is the URL-decoded <key>)
+    - "record" for any other "<host>/records/<pid>[...]" (file_key is None)
+    - None if label is not about a record (pid and file_key are None)
+
+    Plain tuples are returned: they are cheaper to create than named ones.
+    """
+    match = REGEX_LABEL.search(label)
+    if match is None:
+        return NOT_A_RECORD
+
+    pid, key, query = match.groups()
+    if key and query and has_download_param(query):
+        return ("download", pid, unquote(key))
+    return ("record", pid, None)
+
+
+class LabelCache:
+    """Bounded LRU cache of parsed labels.
+
+    The same labels (record pages, file URLs) come back day after day, so
+    conversion cost then scales with distinct labels instead of rows.
+    """
+
+    def __init__(self, maxsize=DEFAULT_LABEL_CACHE_SIZE):
+        """Constructor.
+
+        :param maxsize: int. Maximum number of labels kept (0 disables).
+        """
+        self.maxsize = maxsize
+        self.parse = functools.lru_cache(maxsize=maxsize)(parse_label)
+        self._other_hits = 0
+        self._other_misses = 0
+
+    @property
+    def hits(self):
+        """Number of labels found in cache."""
+        return self.parse.cache_info().hits + self._other_hits
+
+    @property
+    def misses(self):
+        """Number of labels parsed."""
+        return self.parse.cache_info().misses + self._other_misses
+
+    @property
+    def hit_rate(self):
+        """Ratio of labels found in cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def add_counts(self, hits, misses):
+        """Account for lookups of another cache (e.g., of a worker)."""
+        self._other_hits += hits
+        self._other_misses += misses
 
 
 def is_record(analytics_raw):
     """Return if analytics is for a record."""
-    label = analytics_raw.get("label", "")
-    match = REGEX_PID.search(label)
-    return bool(match.group(1)) if match else False
+    kind, _, _ = parse_label(analytics_raw.get("label", ""))
+    return kind is not None
 
 
 def is_download(analytics_raw):
@@ -31,17 +114,22 @@ def is_download(analytics_raw):
     Although Matomo returns what it considers a download,
     this isn't always what we consider a download. For the purposes of
     InvenioRDM, a download is what Matomo returns + filtering on presence
-    of `download=1` querystring parameter (i.e. not a preview, and always
-    unique/at end of label).
+    of `download=1` querystring parameter (i.e. not a preview).
     """
     label = analytics_raw.get("label", "")
-    match = REGEX_DOWNLOAD.search(label)
-    return bool(match)
+    _, _, query = label.partition("#")[0].partition("?")
+    return has_download_param(query)
 
 
 @dataclasses.dataclass
 class DownloadAnalytics:
-    """Intermediate representation."""
+    """Intermediate representation.
+
+    Many of these are held at once: they are slotted and their strings are
+    interned (see create), which keeps them small.
+    """
+
+    __slots__ = ("year_month_day", "pid", "file_key", "visits", "views")
 
     year_month_day: str  # keeping it simple for now
     pid: str
@@ -50,37 +138,43 @@ class DownloadAnalytics:
     views: int
 
     @classmethod
-    def create(cls, year_month_day, analytics_raw):
-        """Create Entry from raw analytics."""
-        label = analytics_raw.get("label", "")
-
-        # extract "3s45v-k5m55" from ".../records/3s45v-k5m55[/...]"
-        # assumes is_record was run on analytics_raw prior to this point
-        pid = REGEX_PID.search(label).group(1)
+    def create(cls, year_month_day, analytics_raw, parsed=None):
+        """Create Entry from raw analytics.
 
-        # extract file key
-        regex_key = re.compile(r"/files/([^?]*)\?download=1")
-        file_key = regex_key.search(label).group(1)
+        :param parsed: tuple. parse_label of analytics_raw's label (if done).
+        """
+        # assumes analytics_raw is for a download
+        parsed = parsed or parse_label(analytics_raw.get("label", ""))
+        _, pid, file_key = parsed
 
         return cls(
-            year_month_day=year_month_day,
-            pid=pid,
-            file_key=file_key,
+            year_month_day=sys.intern(year_month_day),
+            pid=sys.intern(pid),
+            file_key=sys.intern(file_key),
             visits=analytics_raw.get("nb_visits", 0),
             views=analytics_raw.get("nb_hits", 0),
         )
 
 
-def generate_download_analytics(raw_analytics):
-    """Yield DownloadAnalytics entries from raw entries."""
+def generate_download_analytics(raw_analytics, parse=parse_label):
+    """Yield DownloadAnalytics entries from raw entries.
+
+    :param parse: callable. Label parser (e.g., LabelCache().parse).
+    """
     for year_month_day, raw in raw_analytics:
-        if is_record(raw) and is_download(raw):
-            yield DownloadAnalytics.create(year_month_day, raw)
+        parsed = parse(raw.get("label", ""))
+        if parsed[0] == "download":
+            yield DownloadAnalytics.create(year_month_day, raw, parsed)
 
 
 @dataclasses.dataclass
 class ViewAnalytics:
-    """Intermediate representation of view analytics."""
+    """Intermediate representation of view analytics.
+
+    Slotted with interned strings like DownloadAnalytics.
+    """
+
+    __slots__ = ("year_month_day", "pid", "visits", "views")
 
     year_month_day: str  # keeping it simple for now
     pid: str
@@ -88,24 +182,131 @@ class ViewAnalytics:
     views: int
 
     @classmethod
-    def create(cls, year_month_day, analytics_raw):
-        """Create from raw analytics."""
-        label = analytics_raw.get("label", "")
+    def create(cls, year_month_day, analytics_raw, parsed=None):
+        """Create from raw analytics.
 
-        # extract "3s45v-k5m55" from ".../records/3s45v-k5m55[/...]"
-        # assumes is_record was run on analytics_raw prior to this point
-        pid = REGEX_PID.search(label).group(1)
+        :param parsed: tuple. parse_label of analytics_raw's label (if done).
+        """
+        # assumes analytics_raw is for a record
+        parsed = parsed or parse_label(analytics_raw.get("label", ""))
+        _, pid, _ = parsed
 
         return cls(
-            year_month_day=year_month_day,
-            pid=pid,
+            year_month_day=sys.intern(year_month_day),
+            pid=sys.intern(pid),
             visits=analytics_raw.get("nb_visits", 0),
             views=analytics_raw.get("nb_hits", 0),
         )
 
 
-def generate_view_analytics(raw_analytics):
-    """Yield ViewAnalytics entries from raw entries."""
+def generate_view_analytics(raw_analytics, parse=parse_label):
+    """Yield ViewAnalytics entries from raw entries.
+
+    :param parse: callable. Label parser (e.g., LabelCache().parse).
+    """
     for year_month_day, raw in raw_analytics:
-        if is_record(raw):
-            yield ViewAnalytics.create(year_month_day, raw)
+        parsed = parse(raw.get("label", ""))
+        if parsed[0] is not None:
+            yield ViewAnalytics.create(year_month_day, raw, parsed)
+
+
+ANALYTICS_BY_KIND = {
+    "views": (ViewAnalytics, generate_view_analytics),
+    "downloads": (DownloadAnalytics, generate_download_analytics),
+}
+
+
+def generate_analytics_from_filepath(kind, filepath, parse=parse_label):
+    """Yield analytics of kind from filepath.
+
+    Columnar files (already converted) are read without any parsing.
+    """
+    cls, generate_analytics = ANALYTICS_BY_KIND[kind]
+    if not is_columnar(filepath):
+        yield from generate_analytics(read_raw_analytics(filepath), parse)
+        return
+
+    file_kind, rows = read_columnar(filepath)
+    if file_kind != kind:
+        raise ValueError(f"{filepath} has {file_kind}, not {kind}.")
+    for fields in rows:
+        yield cls(*fields)
+
+
+# Label cache of a worker process (kept across the files it converts)
+_worker_label_cache = None
+
+
+def _init_worker(label_cache_size):
+    """Initialize worker process."""
+    global _worker_label_cache
+    _worker_label_cache = LabelCache(label_cache_size)
+
+
+def convert_filepath(kind, filepath):
+    """Return analytics of kind from filepath as compact tuples (in worker).
+
+    Tuples of fields are cheaper to send back from a worker process than
+    dataclass instances. Return (tuples, label cache hits, misses).
+    """
+    label_cache = _worker_label_cache
+    hits, misses = label_cache.hits, label_cache.misses
+    batch = [
+        dataclasses.astuple(analytics)
+        for analytics in generate_analytics_from_filepath(
+            kind, filepath, label_cache.parse
+        )
+    ]
+    return (
+        batch,
+        label_cache.hits - hits,
+        label_cache.misses - misses,
+    )
+
+
+def generate_analytics_from_filepaths(
+    kind, filepaths, workers=1, label_cache=None
+):
+    """Yield analytics of kind from filepaths (raw or columnar).
+
+    With more than 1 worker, files are read and converted in parallel by a
+    pool of processes. Analytics are still yielded in the order of
+    filepaths, so the result is the same as with 1 worker. Files are only
+    submitted up to `LOOKAHEAD_FACTOR * workers` ahead of the one being
+    yielded, so that converted files waiting for a slower consumer (e.g.,
+    ingestion) stay bounded.
+
+    :param label_cache: LabelCache. Its size is used by each worker, and
+        lookups of workers are accounted in it.
+    """
+    cls, _ = ANALYTICS_BY_KIND[kind]
+    label_cache = label_cache or LabelCache()
+    if workers <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            yield from generate_analytics_from_filepath(
+                kind, filepath, label_cache.parse
+            )
+        return
+
+    convert = functools.partial(convert_filepath, kind)
+    workers = min(workers, len(filepaths))
+    filepaths = iter(filepaths)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(label_cache.maxsize,),
+    ) as executor:
+        futures = collections.deque(
+            executor.submit(convert, filepath)
+            for filepath in itertools.islice(
+                filepaths, LOOKAHEAD_FACTOR * workers
+            )
+        )
+        while futures:
+            batch, hits, misses = futures.popleft().result()
+            # The head was consumed: make room for the next file
+            for filepath in itertools.islice(filepaths, 1):
+                futures.append(executor.submit(convert, filepath))
+            label_cache.add_counts(hits, misses)
+            for fields in batch:
+                yield cls(*fields)
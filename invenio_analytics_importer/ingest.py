@@ -8,11 +8,30 @@
 
 """Ingest analytics into InvenioRDM's stats indices."""
 
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 
+from flask import current_app
 from invenio_search import current_search_client
 from invenio_search.engine import search
 
+from invenio_analytics_importer.convert import DownloadAnalytics
+from invenio_analytics_importer.throttle import AIMDController, RetryPolicy
+
+DEFAULT_BULK_CHUNK_SIZE = 500
+DEFAULT_BULK_MAX_CHUNK_BYTES = 10 * 2**20
+DEFAULT_BULK_THREADS = 1
+DEFAULT_BULK_TARGET_LATENCY = 2.0
+
+# Bounds of adaptive chunk sizes
+MIN_BULK_CHUNK_SIZE = 10
+MAX_BULK_CHUNK_SIZE = 10_000
+
+# Status of documents (or bulk requests) rejected by an overloaded cluster
+REJECTED_STATUS = 429
+
 
 def record_exists(entry, cache):
     """Checks if the record of passed analytic exists.
@@ -20,12 +39,9 @@ def record_exists(entry, cache):
     Really this checks if the analytic is for a record in the system and uses
     the cache as the proxy for that.
     """
-    try:
-        # This would work for views or downloads, so is used to assess presence
-        # in cache (assumes some knowledge of how cache is filled)
-        return cache.get_parent_pid(entry.pid) is not None
-    except KeyError:
-        return False
+    # This would work for views or downloads, so is used to assess presence
+    # in cache (assumes some knowledge of how cache is filled)
+    return cache.has_record(entry.pid)
 
 
 def file_key_exists(entry, cache):
@@ -34,10 +50,7 @@ def file_key_exists(entry, cache):
     Really this checks if the file of the record exists in the system and uses
     the cache as the proxy for that.
     """
-    try:
-        return cache.get_file_id(entry.pid, entry.file_key) is not None
-    except KeyError:
-        return False
+    return cache.has_file(entry.pid, entry.file_key)
 
 
 def to_download(entry, cache):
@@ -117,11 +130,188 @@ def generate_view_stats(analytics, cache):
             yield to_view(analytic, cache)
 
 
-def ingest_statistics(actions):
-    """Ingest statistics actions."""
-    search.helpers.bulk(
+def generate_stats(analytics, cache):
+    """Generator for statistics actions of views and downloads (mixed).
+
+    The cache must be filled for downloads (see cache.get_lookup).
+    """
+    for analytic in analytics:
+        if not record_exists(analytic, cache):
+            continue
+        if not isinstance(analytic, DownloadAnalytics):
+            yield to_view(analytic, cache)
+        elif file_key_exists(analytic, cache):
+            yield to_download(analytic, cache)
+
+
+def generate_windowed_stats(windows, generate_stats):
+    """Generator for statistics actions of (analytics, cache) windows.
+
+    :param generate_stats: generate_view_stats, generate_download_stats or
+        generate_stats.
+    """
+    for analytics, cache in windows:
+        yield from generate_stats(analytics, cache)
+
+
+def get_bulk_options():
+    """Return keyword arguments of ingest_statistics as configured."""
+    config = current_app.config
+    return {
+        "chunk_size": config.get(
+            "ANALYTICS_IMPORTER_BULK_CHUNK_SIZE", DEFAULT_BULK_CHUNK_SIZE
+        ),
+        "max_chunk_bytes": config.get(
+            "ANALYTICS_IMPORTER_BULK_MAX_CHUNK_BYTES",
+            DEFAULT_BULK_MAX_CHUNK_BYTES,
+        ),
+        "threads": config.get(
+            "ANALYTICS_IMPORTER_BULK_THREADS", DEFAULT_BULK_THREADS
+        ),
+        "adaptive": config.get("ANALYTICS_IMPORTER_BULK_ADAPTIVE", False),
+    }
+
+
+def send_chunk(client, chunk, max_chunk_bytes, retry_policy):
+    """Index chunk of actions, retrying documents rejected by overload.
+
+    Return (number indexed, if any was rejected, seconds taken). Raise
+    BulkIndexError if documents failed otherwise (or were still rejected
+    after all attempts).
+    """
+    start = time.monotonic()
+    indexed = 0
+    rejected = False
+
+    for attempt in range(1, retry_policy.attempts + 1):
+        try:
+            success, errors = search.helpers.bulk(
+                client,
+                chunk,
+                chunk_size=len(chunk),
+                max_chunk_bytes=max_chunk_bytes,
+                raise_on_error=False,
+            )
+        except search.exceptions.TransportError as e:
+            if e.status_code != REJECTED_STATUS:
+                raise
+            success, retried = 0, chunk
+        else:
+            items = [item for error in errors for item in error.values()]
+            failed = [i for i in items if i.get("status") != REJECTED_STATUS]
+            if failed:
+                raise search.helpers.BulkIndexError(
+                    f"{len(failed)} document(s) failed to index.", failed
+                )
+            rejected_ids = {(i["_index"], i["_id"]) for i in items}
+            retried = [
+                a for a in chunk if (a["_index"], a["_id"]) in rejected_ids
+            ]
+
+        indexed += success
+        if not retried:
+            return indexed, rejected, time.monotonic() - start
+        rejected = True
+        chunk = retried
+        if attempt < retry_policy.attempts:
+            time.sleep(retry_policy.delay(attempt))
+
+    raise search.helpers.BulkIndexError(
+        f"{len(chunk)} document(s) still rejected after "
+        f"{retry_policy.attempts} attempts.",
+        [],
+    )
+
+
+def ingest_statistics_by_chunks(
+    actions,
+    chunk_size,
+    max_chunk_bytes,
+    threads,
+    adaptive,
+    target_latency=DEFAULT_BULK_TARGET_LATENCY,
+    retry_policy=None,
+):
+    """Ingest statistics actions by chunks sent by a pool of threads.
+
+    Actions are consumed (and so records looked up) on the calling thread
+    only, which holds the app context and DB session: threads only send
+    chunks. With `adaptive`, chunk sizes grow additively while chunks are
+    indexed within `target_latency` seconds, and are halved when one takes
+    longer or has documents rejected.
+
+    Return number of ingested statistics.
+    """
+    client = current_search_client._get_current_object()
+    retry_policy = retry_policy or RetryPolicy()
+    controller = AIMDController(
+        chunk_size,
+        minimum=min(chunk_size, MIN_BULK_CHUNK_SIZE),
+        maximum=max(chunk_size, MAX_BULK_CHUNK_SIZE),
+        # Each indexed document is a success: a chunk grows by ~10% of the
+        # initial size per chunk
+        increase=max(1, chunk_size // 10),
+    )
+    actions = iter(actions)
+    indexed = 0
+
+    with ThreadPoolExecutor(threads) as executor:
+        pending = set()
+        while True:
+            chunk = list(itertools.islice(actions, controller.value))
+            if chunk:
+                future = executor.submit(
+                    send_chunk, client, chunk, max_chunk_bytes, retry_policy
+                )
+                pending.add(future)
+            if not pending:
+                break
+            if chunk and len(pending) < threads:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                success, rejected, latency = future.result()
+                indexed += success
+                if not adaptive:
+                    continue
+                if rejected or latency > target_latency:
+                    controller.on_overload()
+                else:
+                    for _ in range(success):
+                        controller.on_success()
+
+    return indexed
+
+
+def ingest_statistics(
+    actions,
+    chunk_size=DEFAULT_BULK_CHUNK_SIZE,
+    max_chunk_bytes=DEFAULT_BULK_MAX_CHUNK_BYTES,
+    threads=DEFAULT_BULK_THREADS,
+    adaptive=False,
+):
+    """Ingest statistics actions.
+
+    :param chunk_size: int. Documents per bulk request (initial size if
+        adaptive).
+    :param max_chunk_bytes: int. Maximum size of a bulk request.
+    :param threads: int. Bulk requests sent concurrently.
+    :param adaptive: bool. Adjust chunk sizes to observed latency and
+        rejections (see ingest_statistics_by_chunks).
+
+    Return number of ingested statistics.
+    """
+    if threads > 1 or adaptive:
+        return ingest_statistics_by_chunks(
+            actions, chunk_size, max_chunk_bytes, threads, adaptive
+        )
+
+    success, _ = search.helpers.bulk(
         current_search_client,
         actions,
         stats_only=True,
-        chunk_size=50,
+        chunk_size=chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
     )
+    return success
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Manifest of retrieved days.
+
+The manifest lives next to the retrieved files and records, per kind, every
+day that was retrieved:
+
+{
+    "views": {
+        "2024-08-01": {
+            "fetched_at": "2024-09-02T10:00:00+00:00",
+            "rows": 123,
+            "sha256": "<checksum of the day's analytics>"
+        },
+        ...
+    },
+    "downloads": {...}
+}
+"""
+
+import datetime as dt
+import hashlib
+import json
+
+from invenio_analytics_importer.read import read_json
+from invenio_analytics_importer.write import write_json
+
+# A day is only considered final if it was fetched at least this many days
+# after it. The margin accounts for the provider's timezone and late
+# processing of its logs.
+SETTLE_DAYS = 2
+
+
+def checksum(analytics):
+    """Return sha256 checksum of a day's analytics."""
+    encoded = json.dumps(analytics, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class Manifest:
+    """Manifest of retrieved days."""
+
+    filename = "manifest.json"
+
+    def __init__(self, filepath, entries=None):
+        """Constructor."""
+        self.filepath = filepath
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, directory):
+        """Load manifest of directory (empty if none yet)."""
+        filepath = directory / cls.filename
+        entries = read_json(filepath) if filepath.exists() else {}
+        return cls(filepath, entries)
+
+    def save(self):
+        """Save manifest."""
+        tmp_filepath = self.filepath.with_name(self.filepath.name + ".part")
+        write_json(tmp_filepath, self.entries)
+        tmp_filepath.replace(self.filepath)
+
+    def record(self, kind, day, analytics, fetched_at=None):
+        """Record that day's analytics of kind were retrieved."""
+        fetched_at = fetched_at or dt.datetime.now(dt.timezone.utc)
+        self.entries.setdefault(kind, {})[day] = {
+            "fetched_at": fetched_at.isoformat(),
+            "rows": len(analytics),
+            "sha256": checksum(analytics),
+        }
+
+    def is_stale(self, kind, day):
+        """Return if day was retrieved before it was over (or not at all)."""
+        entry = self.entries.get(kind, {}).get(day)
+        if not entry:
+            return True
+        fetched_on = dt.datetime.fromisoformat(entry["fetched_at"]).date()
+        settled_on = dt.date.fromisoformat(day) + dt.timedelta(SETTLE_DAYS)
+        return fetched_on < settled_on
+
+    def is_complete(self, kind, day):
+        """Return if day of kind was retrieved for good."""
+        return not self.is_stale(kind, day)
+
+    def get_since_last_period(self, kinds, today=None):
+        """Return (YYYY-MM, YYYY-MM) period covering what's left to retrieve.
+
+        The period starts at the first stale day (or the day after the last
+        retrieved day) across kinds and ends with today's month. Return None
+        if nothing was retrieved yet for some kind.
+        """
+        today = today or dt.date.today()
+        starts = []
+        for kind in kinds:
+            days = sorted(self.entries.get(kind, {}))
+            if not days:
+                return None
+            stale = [d for d in days if self.is_stale(kind, d)]
+            if stale:
+                starts.append(dt.date.fromisoformat(stale[0]))
+            else:
+                starts.append(
+                    dt.date.fromisoformat(days[-1]) + dt.timedelta(1)
+                )
+
+        start = min(min(starts), today)
+        return start.strftime("%Y-%m"), today.strftime("%Y-%m")
@@ -6,21 +6,66 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 
-"""Read."""
+"""Read.
+
+Analytics files come in 2 formats (determined by the file extension):
+
+- JSON (.json): {"YYYY-MM-DD": [analytic, ...], ...}
+- NDJSON (.ndjson): one ["YYYY-MM-DD", analytic] per line. Lines are read
+  one at a time, so memory doesn't depend on the size of the file.
+"""
 
 import json
 
+from invenio_analytics_importer.compression import open_text, remove_extension
+
+NDJSON_EXTENSION = ".ndjson"
+
+
+def is_ndjson(filepath):
+    """Return if filepath is in NDJSON format (based on its extension)."""
+    return remove_extension(filepath).suffix == NDJSON_EXTENSION
+
 
 def read_json(filepath):
-    """Read json filepath."""
-    with open(filepath) as f:
+    """Read json filepath (decompressed based on its extension)."""
+    with open_text(filepath) as f:
         return json.load(f)
 
 
+def read_ndjson(filepath):
+    """Iterate (YYYY-MM-DD, analytic) from NDJSON filepath, lazily."""
+    with open_text(filepath) as f:
+        for line in f:
+            if line.strip():
+                year_month_day, raw_analytics = json.loads(line)
+                yield (year_month_day, raw_analytics)
+
+
+def read_raw_analytics(filepath):
+    """Iterate (YYYY-MM-DD, analytic) from filepath (in either format)."""
+    if is_ndjson(filepath):
+        yield from read_ndjson(filepath)
+        return
+
+    analytics_from_fp = read_json(filepath)
+    for year_month_day, raw_analytics_list in analytics_from_fp.items():
+        for raw_analytics in raw_analytics_list:
+            yield (year_month_day, raw_analytics)
+
+
+def read_analytics_by_day(filepath):
+    """Read {YYYY-MM-DD: [analytic, ...]} from filepath (in either format)."""
+    if not is_ndjson(filepath):
+        return read_json(filepath)
+
+    analytics_by_day = {}
+    for year_month_day, raw_analytics in read_ndjson(filepath):
+        analytics_by_day.setdefault(year_month_day, []).append(raw_analytics)
+    return analytics_by_day
+
+
 def read_raw_analytics_from_filepaths(filepaths):
     """Iterate (YYYY-MM-DD, analytic) from all filepaths."""
     for fp in filepaths:
-        analytics_from_fp = read_json(fp)
-        for year_month_day, raw_analytics_list in analytics_from_fp.items():
-            for raw_analytics in raw_analytics_list:
-                yield (year_month_day, raw_analytics)
+        yield from read_raw_analytics(fp)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""On-disk cache of provider responses.
+
+Analytics of a day don't change once the day is over. Responses for those days
+are kept on disk, addressed by a hash of what was requested, so that
+retrieving the same period again doesn't hit the provider.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from invenio_analytics_importer.read import read_json
+from invenio_analytics_importer.write import write_json
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of daily responses.
+
+    Only days at least `min_age_days` old are cached: more recent days are
+    always requested again. Once over `max_size` bytes, least recently used
+    entries are evicted.
+    """
+
+    extension = ".json.gz"
+
+    def __init__(self, directory, max_size, min_age_days=2, today=None):
+        """Constructor."""
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.min_age_days = min_age_days
+        self.today = today or dt.date.today()
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = sum(fp.stat().st_size for fp in self._iter_filepaths())
+
+    def _iter_filepaths(self):
+        """Iterate over filepaths of entries."""
+        return self.directory.glob(f"*/*{self.extension}")
+
+    def _filepath(self, key):
+        """Return filepath of entry with given key."""
+        return self.directory / key[:2] / f"{key}{self.extension}"
+
+    def key(self, **request):
+        """Return key of request (dict of what determines the response)."""
+        encoded = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def is_cacheable(self, day):
+        """Return if the response for YYYY-MM-DD day can be cached."""
+        age = self.today - dt.date.fromisoformat(day)
+        return age.days >= self.min_age_days
+
+    def get(self, key):
+        """Return cached response for key (or None)."""
+        filepath = self._filepath(key)
+        try:
+            response = read_json(filepath)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Modification time tracks last use for eviction
+        os.utime(filepath)
+        self.hits += 1
+        return response
+
+    def set(self, key, response):
+        """Cache response for key."""
+        filepath = self._filepath(key)
+        filepath.parent.mkdir(exist_ok=True)
+        tmp_filepath = filepath.with_name(filepath.name + ".part")
+        write_json(
+            tmp_filepath,
+            response,
+            indent=None,
+            separators=(",", ":"),
+            compression="gzip",
+        )
+        previous_size = filepath.stat().st_size if filepath.exists() else 0
+        tmp_filepath.replace(filepath)
+        self.size += filepath.stat().st_size - previous_size
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Evict least recently used entries down to 90% of max size.
+
+        Going below max size amortizes the cost of listing entries.
+        """
+        entries = sorted(
+            (fp.stat().st_mtime, fp.stat().st_size, fp)
+            for fp in self._iter_filepaths()
+        )
+        target = 0.9 * self.max_size
+        for _, size, filepath in entries:
+            if self.size <= target:
+                break
+            filepath.unlink()
+            self.size -= size
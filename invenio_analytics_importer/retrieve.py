@@ -11,13 +11,36 @@
 import abc
 import asyncio
 import calendar
+import collections
 import dataclasses
+import datetime as dt
+import itertools
+import time
 from typing import Any
 
 import httpx
 from flask import current_app
 
-from invenio_analytics_importer.write import write_json
+from invenio_analytics_importer.compression import (
+    EXTENSION_BY_COMPRESSION,
+    add_extension,
+)
+from invenio_analytics_importer.convert import is_record
+from invenio_analytics_importer.manifest import Manifest
+from invenio_analytics_importer.read import read_analytics_by_day
+from invenio_analytics_importer.response_cache import ResponseCache
+from invenio_analytics_importer.stream import JSONItemsDecoder
+from invenio_analytics_importer.throttle import (
+    AdaptiveConcurrencyLimiter,
+    RetryPolicy,
+    TokenBucket,
+)
+from invenio_analytics_importer.write import get_analytics_writer
+
+# Windows scheduled ahead of the one being yielded, per request in flight
+LOOKAHEAD_FACTOR = 2
+
+FILE_FORMATS = ("json", "ndjson")
 
 
 class ProviderClient(abc.ABC):
@@ -31,62 +54,391 @@ class ProviderClient(abc.ABC):
     async def fetch_downloads_for_day(self, day):
         """Fetch downloads for given day."""
 
+    async def fetch_views_for_days(self, days):
+        """Fetch views for given days as {day: views}.
+
+        Providers able to return many days at once should override this. By
+        default, days are fetched one by one.
+        """
+        views = await asyncio.gather(
+            *[self.fetch_views_for_day(day) for day in days]
+        )
+        return dict(zip(days, views))
+
+    async def fetch_downloads_for_days(self, days):
+        """Fetch downloads for given days as {day: downloads}.
+
+        Providers able to return many days at once should override this. By
+        default, days are fetched one by one.
+        """
+        downloads = await asyncio.gather(
+            *[self.fetch_downloads_for_day(day) for day in days]
+        )
+        return dict(zip(days, downloads))
+
+
+def is_retryable(exc):
+    """Return if the request that raised exc is worth retrying.
+
+    Those errors are also the ones signaling an overloaded server.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class MatomoError(httpx.HTTPError):
+    """Error reported by Matomo in a successful (HTTP 200) response."""
+
+
+def raise_for_matomo_error(response, body):
+    """Raise MatomoError if body (decoded) is an error reported by Matomo.
+
+    Matomo reports API errors as {"result": "error", "message": ...}.
+    """
+    if isinstance(body, dict) and body.get("result") == "error":
+        error = MatomoError(f"Matomo error: {body.get('message')}")
+        error.request = response.request
+        raise error
+
+
+def get_retry_after(exc):
+    """Return seconds to wait as per the Retry-After header (or 0)."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return 0
+    try:
+        return float(exc.response.headers.get("Retry-After", 0))
+    except ValueError:  # HTTP-date form is not worth supporting here
+        return 0
+
+
+def expand_date(date):
+    """Return days of a "YYYY-MM-DD" or "YYYY-MM-DD,YYYY-MM-DD" date."""
+    start, _, end = date.partition(",")
+    start = dt.date.fromisoformat(start)
+    end = dt.date.fromisoformat(end) if end else start
+    return [
+        (start + dt.timedelta(i)).isoformat()
+        for i in range((end - start).days + 1)
+    ]
+
+
+def slim_analytic(analytic):
+    """Return analytic with only what ingestion needs (or None if useless)."""
+    if not is_record(analytic):
+        return None
+    return {
+        field: analytic[field]
+        for field in ("label", "nb_hits", "nb_visits")
+        if field in analytic
+    }
+
+
+@dataclasses.dataclass
+class FailedRequest:
+    """Request that failed even after retries."""
+
+    method: str
+    date: str
+    error: str
+
+    @property
+    def days(self):
+        """Days covered by the request."""
+        return expand_date(self.date)
+
 
 @dataclasses.dataclass
 class MatomoAnalytics(ProviderClient):
-    """Matomo API client."""
+    """Matomo API client.
+
+    Requests are retried with exponential backoff on transient errors. They
+    can optionally be rate limited (rate_limiter) and have their concurrency
+    adapted to the server's responsiveness (concurrency_limiter). Requests
+    that still failed are kept in `failures`.
+
+    Labels can be filtered server-side with a Matomo regex (filter_pattern)
+    and large responses paginated (page_size rows per request).
+
+    Daily responses of days that are over can be cached (response_cache).
+
+    With `slim`, responses are parsed as they stream in and only what
+    ingestion needs is kept.
+    """
 
     client: Any
     base_url: str
     site_id: int
     token_auth: str
+    retry_policy: RetryPolicy = dataclasses.field(default_factory=RetryPolicy)
+    rate_limiter: Any = None
+    concurrency_limiter: Any = None
+    failures: list = dataclasses.field(default_factory=list)
+    filter_pattern: str = ""
+    page_size: int = 0
+    response_cache: Any = None
+    slim: bool = False
+
+    method_by_kind = {
+        "views": "Actions.getPageUrls",
+        "downloads": "Actions.getDownloads",
+    }
+
+    def has_failed(self, method, day):
+        """Return if retrieval of method for day failed."""
+        return any(
+            f.method == method and day in f.days for f in self.failures
+        )
 
-    async def get_analytics_for_day(self, method, day):
-        """Get analytics for given YYYY-MM-DD in json format.
+    def failed_days(self, kind):
+        """Return days of kind whose retrieval failed."""
+        method = self.method_by_kind[kind]
+        return {
+            day
+            for failure in self.failures
+            if failure.method == method
+            for day in failure.days
+        }
 
-        Response format:
+    async def send(self, params):
+        """Send a single request.
 
-        {
-            "label": "example.org/records/0dfv3-cmw61/files/f.pdf?download=1]",
-            "nb_hits": 1,
-            "nb_uniq_visitors": 1,
-            "nb_visits": 1,
-        },
+        Return (analytics or None if no data, whether a page was full).
+        """
+        if self.slim:
+            return await self.send_streamed(params)
+
+        response = await self.client.post(
+            self.base_url,
+            params=params,
+            data={"token_auth": self.token_auth}
+        )
+        response.raise_for_status()
+
+        if response.text == "No data available":
+            return None, False
+
+        analytics = response.json()
+        raise_for_matomo_error(response, analytics)
+        return analytics, self.is_full_page(analytics)
+
+    async def send_streamed(self, params):
+        """Send a single request, slimming analytics as they stream in.
+
+        Only a single analytic at a time is fully decoded, and only what
+        ingestion needs is kept (see slim_analytic).
+        """
+        decoder = JSONItemsDecoder()
+        analytics = {}
+        rows = collections.Counter()
+        async with self.client.stream(
+            "POST",
+            self.base_url,
+            params=params,
+            data={"token_auth": self.token_auth}
+        ) as response:
+            response.raise_for_status()
+            async for text in response.aiter_text():
+                for key, analytic in decoder.feed(text):
+                    rows[key] += 1
+                    analytics.setdefault(key, [])
+                    slimmed = slim_analytic(analytic)
+                    if slimmed:
+                        analytics[key].append(slimmed)
+            raise_for_matomo_error(response, decoder.members)
+        decoder.close()
+
+        if decoder.text is not None:  # "No data available"
+            return None, False
+
+        is_full = bool(self.page_size) and any(
+            count >= self.page_size for count in rows.values()
+        )
+        if not decoder.is_object:
+            return analytics.get(None, []), is_full
+        return analytics, is_full
+
+    async def post(self, params):
+        """Send a single request within rate and concurrency limits."""
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+
+        limiter = self.concurrency_limiter
+        if limiter is None:
+            return await self.send(params)
+
+        async with limiter:
+            start = time.monotonic()
+            try:
+                result = await self.send(params)
+            except httpx.HTTPError as exc:
+                if is_retryable(exc):
+                    limiter.on_overload()
+                raise
+            limiter.on_success(time.monotonic() - start)
+            return result
+
+    async def request(self, method, date, offset=0):
+        """Request analytics for given date (or date range) in json format.
+
+        Return (analytics, whether a page was full). analytics is None if the
+        request failed (even after retries) or no data is available.
         """
         params = {
             "module": "API",
             "format": "json",
             "idSite": self.site_id,
             "period": "day",
-            "date": day,
+            "date": date,
             "method": method,
             "flat": 1,
             "showMetadata": 0,
         }
+        if self.filter_pattern:
+            params["filter_pattern"] = self.filter_pattern
+        if self.page_size:
+            params["filter_limit"] = self.page_size
+            params["filter_offset"] = offset
+
+        attempts = self.retry_policy.attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self.post(params)
+            except httpx.HTTPError as exc:
+                if attempt == attempts or not is_retryable(exc):
+                    print(f"Error : {exc.request.url} : {exc}")
+                    self.failures.append(FailedRequest(method, date, str(exc)))
+                    return None, False
+                delay = self.retry_policy.delay(attempt)
+                await asyncio.sleep(max(delay, get_retry_after(exc)))
+
+    def is_full_page(self, analytics):
+        """Return if analytics (of a day or of days) may have a next page."""
+        if not self.page_size or not analytics:
+            return False
+        if isinstance(analytics, dict):
+            return any(len(a) >= self.page_size for a in analytics.values())
+        return len(analytics) >= self.page_size
+
+    async def request_all_pages(self, method, date):
+        """Request analytics for given date (or date range) across pages.
+
+        Without page_size, this is a single request.
+        """
+        analytics, is_full = await self.request(method, date)
+        offset = 0
+        while is_full:
+            offset += self.page_size
+            page, is_full = await self.request(method, date, offset)
+            if isinstance(page, dict):
+                for day, analytics_of_day in page.items():
+                    analytics.setdefault(day, []).extend(analytics_of_day)
+            elif page:
+                analytics.extend(page)
+        return analytics
+
+    def get_cached(self, method, day):
+        """Return cached analytics of day (or None)."""
+        cache = self.response_cache
+        if cache is None or not cache.is_cacheable(day):
+            return None
+        return cache.get(self.cache_key(method, day))
+
+    def set_cached(self, method, day, analytics):
+        """Cache analytics of day if possible."""
+        cache = self.response_cache
+        if cache is None or not cache.is_cacheable(day):
+            return
+        if self.has_failed(method, day):
+            return
+        cache.set(self.cache_key(method, day), analytics)
+
+    def cache_key(self, method, day):
+        """Return response cache key of day for method."""
+        return self.response_cache.key(
+            base_url=self.base_url,
+            site_id=self.site_id,
+            method=method,
+            day=day,
+            filter_pattern=self.filter_pattern,
+            slim=self.slim,
+        )
 
-        try:
-            response = await self.client.post(
-                self.base_url,
-                params=params,
-                data={"token_auth": self.token_auth}
-            )
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            print(f"Error : {exc.request.url} : {exc}")
-            return []
+    async def get_analytics_for_day(self, method, day):
+        """Get analytics for given YYYY-MM-DD in json format.
 
-        if response.text == "No data available":
-            return []
+        Response format:
+
+        {
+            "label": "example.org/records/0dfv3-cmw61/files/f.pdf?download=1]",
+            "nb_hits": 1,
+            "nb_uniq_visitors": 1,
+            "nb_visits": 1,
+        },
+        """
+        analytics = self.get_cached(method, day)
+        if analytics is None:
+            analytics = await self.request_all_pages(method, day) or []
+            self.set_cached(method, day, analytics)
+        return analytics
 
-        return response.json()
+    async def get_analytics_for_days(self, method, days):
+        """Get analytics for given consecutive YYYY-MM-DDs in one request.
+
+        Matomo returns the daily analytics of a date range keyed by day:
+
+        {
+            "2024-08-01": [<analytics as in get_analytics_for_day>],
+            "2024-08-02": [],
+            ...
+        }
+
+        Days without data are returned with []. Cached days are not requested
+        (which can split the request in a few).
+        """
+        analytics = {}
+        missing_days = []
+        for day in days:
+            analytics_of_day = self.get_cached(method, day)
+            if analytics_of_day is None:
+                missing_days.append(day)
+            else:
+                analytics[day] = analytics_of_day
+
+        for window in split_into_windows(missing_days, len(days)):
+            if len(window) == 1:
+                day = window[0]
+                analytics[day] = await self.get_analytics_for_day(method, day)
+                continue
+
+            date = f"{window[0]},{window[-1]}"
+            analytics_of_window = await self.request_all_pages(method, date)
+            for day in window:
+                analytics[day] = (analytics_of_window or {}).get(day) or []
+                self.set_cached(method, day, analytics[day])
+
+        return {day: analytics[day] for day in days}
 
     async def fetch_downloads_for_day(self, day):
         """Fetch downloads analytics for day."""
-        return await self.get_analytics_for_day("Actions.getDownloads", day)
+        method = self.method_by_kind["downloads"]
+        return await self.get_analytics_for_day(method, day)
 
     async def fetch_views_for_day(self, day):
         """Fetch views analytics for day."""
-        return await self.get_analytics_for_day("Actions.getPageUrls", day)
+        method = self.method_by_kind["views"]
+        return await self.get_analytics_for_day(method, day)
+
+    async def fetch_downloads_for_days(self, days):
+        """Fetch downloads analytics for consecutive days."""
+        method = self.method_by_kind["downloads"]
+        return await self.get_analytics_for_days(method, days)
+
+    async def fetch_views_for_days(self, days):
+        """Fetch views analytics for consecutive days."""
+        method = self.method_by_kind["views"]
+        return await self.get_analytics_for_days(method, days)
 
 
 class ViewsFetcher:
@@ -100,6 +452,10 @@ class ViewsFetcher:
         """Fetch views analytics for given day."""
         return await self.client.fetch_views_for_day(day)
 
+    async def fetch_analytics_for_days(self, days):
+        """Fetch views analytics for given consecutive days."""
+        return await self.client.fetch_views_for_days(days)
+
 
 class DownloadsFetcher:
     """Fetches downloads."""
@@ -112,6 +468,10 @@ class DownloadsFetcher:
         """Fetch download analytics for given day."""
         return await self.client.fetch_downloads_for_day(day)
 
+    async def fetch_analytics_for_days(self, days):
+        """Fetch download analytics for given consecutive days."""
+        return await self.client.fetch_downloads_for_days(days)
+
 
 def generate_days_by_year_month(period):
     """
@@ -144,41 +504,341 @@ def generate_days_by_year_month(period):
             m = 1
 
 
-async def fetch_monthly_analytics(fetcher, period):
+def split_into_windows(days, days_per_window):
+    """Split days into windows of at most days_per_window consecutive days.
+
+    Gaps between days (e.g., already retrieved days) also start new windows.
+    """
+    windows = []
+    previous = None
+    for day in days:
+        date = dt.date.fromisoformat(day)
+        if (
+            not windows
+            or len(windows[-1]) >= days_per_window
+            or date - previous != dt.timedelta(1)
+        ):
+            windows.append([])
+        windows[-1].append(day)
+        previous = date
+    return windows
+
+
+async def fetch_period_windows(
+    fetchers, period, concurrency=31, days_per_request=1, include=None
+):
+    """Yield (kind, YYYY-MM, {YYYY-MM-DD: analytics}) for each request window.
+
+    Requests are scheduled in (month, kind) order ahead of the window being
+    yielded, and at most `concurrency` of them are in flight at any time. So a
+    slow day doesn't stall the next windows, and windows are still yielded in
+    order. Requests are only scheduled up to `LOOKAHEAD_FACTOR * concurrency`
+    windows ahead, so that windows fetched but not yet yielded (behind a slow
+    one) stay bounded. A window's analytics are released as soon as it has
+    been yielded.
+
+    :param fetchers: dict. kind -> fetcher
+    :param concurrency: int. Maximum number of requests in flight.
+    :param days_per_request: int. Number of consecutive days fetched per
+        request. Windows never span across months, so any value >= 31 fetches
+        a whole month in 1 request.
+    :param include: callable. (kind, YYYY-MM-DD) -> bool. Only fetch days for
+        which it returns True (default: all days).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(fetcher, days):
+        async with semaphore:
+            if len(days) == 1:
+                day = days[0]
+                return {day: await fetcher.fetch_analytics_for_day(day)}
+            return await fetcher.fetch_analytics_for_days(days)
+
+    def generate_requests():
+        """Yield (kind, YYYY-MM, fetcher, window) in order."""
+        for year_month, days in generate_days_by_year_month(period):
+            days = list(days)
+            for kind, fetcher in fetchers.items():
+                days_of_kind = [
+                    d for d in days if not include or include(kind, d)
+                ]
+                for window in split_into_windows(
+                    days_of_kind, days_per_request
+                ):
+                    yield kind, year_month, fetcher, window
+
+    requests = generate_requests()
+    scheduled = collections.deque()
+
+    def schedule():
+        """Schedule requests up to the lookahead."""
+        lookahead = LOOKAHEAD_FACTOR * concurrency
+        for kind, year_month, fetcher, window in itertools.islice(
+            requests, max(0, lookahead - len(scheduled))
+        ):
+            task = asyncio.create_task(fetch(fetcher, window))
+            scheduled.append((kind, year_month, task))
+
+    try:
+        schedule()
+        while scheduled:
+            kind, year_month, task = scheduled.popleft()
+            analytics = await task
+            # The head was consumed: make room for the next request
+            schedule()
+            yield kind, year_month, analytics
+    finally:
+        # Only has an effect if the consumer stopped early or a request failed
+        for _, _, task in scheduled:
+            task.cancel()
+
+
+async def fetch_period_analytics(
+    fetchers, period, concurrency=31, days_per_request=1, include=None
+):
+    """Yield (kind, YYYY-MM, {YYYY-MM-DD: analytics}) for the whole period.
+
+    See fetch_period_windows for scheduling and parameters.
+    """
+    windows = fetch_period_windows(
+        fetchers, period, concurrency, days_per_request, include
+    )
+    current = None
+    analytics_monthly = {}
+    async for kind, year_month, analytics_of_window in windows:
+        if current and current != (kind, year_month):
+            yield (*current, analytics_monthly)
+            analytics_monthly = {}
+        current = (kind, year_month)
+        analytics_monthly.update(analytics_of_window)
+
+    if current:
+        yield (*current, analytics_monthly)
+
+
+async def fetch_monthly_analytics(
+    fetcher, period, days_per_request=1, concurrency=31
+):
     """Yield fetched analytics by month (and day within month)."""
-    days_by_yr_m = generate_days_by_year_month(period)
-
-    for year_month, days in days_by_yr_m:
-        days_l = list(days)
-        # This maps to 30~ concurrent network calls at a time which has been
-        # fine so far. It may return lots of data to hold in memory though.
-        # This has been fine for us so far as well, but it's a trade-off in
-        # favor of less files and more understandable periods.
-        analytics_daily = await asyncio.gather(
-            *[fetcher.fetch_analytics_for_day(day) for day in days_l]
-        )
-        analytics_monthly = dict(zip(days_l, analytics_daily))
+    analytics_by_month = fetch_period_analytics(
+        {None: fetcher}, period, concurrency, days_per_request
+    )
+    async for _, year_month, analytics_monthly in analytics_by_month:
         yield year_month, analytics_monthly
 
 
-async def retrieve_period_analytics(provider, kind, period, output_dir):
-    """Framing device."""
-    async with httpx.AsyncClient() as client:
+class MonthlyFilesWriter:
+    """Write windows of analytics to their {kind}_{YYYY-MM}.json file.
+
+    With `file_format` "ndjson", files are {kind}_{YYYY-MM}.ndjson instead.
+
+    Days are written as soon as they come and recorded in the manifest once
+    their month's file is complete. Days that failed to be retrieved are
+    written as [] but not recorded, so they are retrieved again on resume.
+    With `merge`, days already in a month's file are kept unless retrieved
+    successfully again. That file may have been written in another format or
+    compression: its days are then carried over to the file of the current
+    ones, which replaces it.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        manifest,
+        failed_days,
+        compression=None,
+        compact=False,
+        merge=False,
+        file_format="json",
+    ):
+        """Constructor.
+
+        :param failed_days: callable. kind -> days whose retrieval failed.
+        """
+        self.output_dir = output_dir
+        self.manifest = manifest
+        self.failed_days = failed_days
+        self.compression = compression
+        self.indent = None if compact else 2
+        self.merge = merge
+        self.file_format = file_format
+        self._writer = None
+        self._retrieved = []
+        self._replaced = []
+
+    def get_existing_filepaths(self, kind, year_month):
+        """Return files of kind and month in any format and compression.
+
+        Least recently modified first.
+        """
+        filepaths = [
+            add_extension(
+                self.output_dir / f"{kind}_{year_month}.{file_format}",
+                compression,
+            )
+            for file_format in FILE_FORMATS
+            for compression in (None, *EXTENSION_BY_COMPRESSION)
+        ]
+        existing = [fp for fp in filepaths if fp.exists()]
+        return sorted(existing, key=lambda fp: fp.stat().st_mtime)
+
+    def write(self, kind, year_month, analytics):
+        """Write analytics ({day: analytics of day}) of kind."""
+        filepath = add_extension(
+            self.output_dir / f"{kind}_{year_month}.{self.file_format}",
+            self.compression,
+        )
+        if self._writer is None or self._writer.filepath != filepath:
+            self.close()
+            carry_over = None
+            if self.merge:
+                carry_over = {}
+                for existing in self.get_existing_filepaths(kind, year_month):
+                    # More recent files take precedence
+                    carry_over.update(read_analytics_by_day(existing))
+                    if existing != filepath:
+                        self._replaced.append(existing)
+            self._writer = get_analytics_writer(
+                filepath, indent=self.indent, carry_over=carry_over
+            )
+
+        failed_days = self.failed_days(kind)
+        for day in sorted(analytics):
+            if day in failed_days:
+                # When merging, keep what was there before
+                if not self.merge:
+                    self._writer.write(day, analytics[day])
+                continue
+            self._writer.write(day, analytics[day])
+            self._retrieved.append((kind, day, analytics[day]))
+
+    def close(self):
+        """Complete current file and record its days."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        # Their days were all carried over to the new file
+        for filepath in self._replaced:
+            filepath.unlink()
+        self._replaced = []
+        for kind, day, analytics_of_day in self._retrieved:
+            self.manifest.record(kind, day, analytics_of_day)
+        self._retrieved = []
+        self.manifest.save()
+
+    def abort(self):
+        """Discard current file."""
+        if self._writer:
+            self._writer.abort()
+            self._writer = None
+        self._retrieved = []
+        self._replaced = []
+
+
+async def retrieve_period_analytics(
+    provider,
+    kinds,
+    period,
+    output_dir,
+    concurrency=31,
+    days_per_request=1,
+    compact=False,
+    compression=None,
+    resume=False,
+    slim=False,
+    file_format="json",
+):
+    """Framing device.
+
+    Days are written to their month's file as soon as they are fetched.
+    With `resume`, only days not retrieved for good yet (as per the manifest)
+    are retrieved and merged into existing files.
+    """
+    manifest = Manifest.load(output_dir)
+    config = current_app.config
+    response_cache = None
+    if config.get("ANALYTICS_IMPORTER_RESPONSE_CACHE_DIR"):
+        response_cache = ResponseCache(
+            config["ANALYTICS_IMPORTER_RESPONSE_CACHE_DIR"],
+            max_size=config.get(
+                "ANALYTICS_IMPORTER_RESPONSE_CACHE_MAX_SIZE", 10 * 2**30
+            ),
+            min_age_days=config.get(
+                "ANALYTICS_IMPORTER_RESPONSE_CACHE_MIN_AGE_DAYS", 2
+            ),
+        )
+
+    limits = httpx.Limits(max_connections=concurrency)
+    timeout = config.get("ANALYTICS_IMPORTER_MATOMO_TIMEOUT", 60)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
         # If other providers, do selection + creation here.
         # For now, there isn't, so no selection logic.
+        rate_limit = config.get("ANALYTICS_IMPORTER_MATOMO_RATE_LIMIT")
         client_of_provider = MatomoAnalytics(
             client,
-            base_url=current_app.config.get("ANALYTICS_IMPORTER_MATOMO_URL"),
-            site_id=current_app.config.get("ANALYTICS_IMPORTER_MATOMO_SITE_ID"),  # noqa
-            token_auth=current_app.config.get("ANALYTICS_IMPORTER_MATOMO_TOKEN"),  # noqa
+            base_url=config.get("ANALYTICS_IMPORTER_MATOMO_URL"),
+            site_id=config.get("ANALYTICS_IMPORTER_MATOMO_SITE_ID"),
+            token_auth=config.get("ANALYTICS_IMPORTER_MATOMO_TOKEN"),
+            retry_policy=RetryPolicy(
+                attempts=config.get("ANALYTICS_IMPORTER_MATOMO_ATTEMPTS", 5)
+            ),
+            rate_limiter=TokenBucket(rate_limit) if rate_limit else None,
+            concurrency_limiter=AdaptiveConcurrencyLimiter(concurrency),
+            filter_pattern=config.get(
+                "ANALYTICS_IMPORTER_MATOMO_FILTER_PATTERN", ""
+            ),
+            page_size=config.get("ANALYTICS_IMPORTER_MATOMO_PAGE_SIZE", 0),
+            response_cache=response_cache,
+            slim=slim,
         )
 
-        if kind == "views":
-            fetcher = ViewsFetcher(client_of_provider)
-        elif kind == "downloads":
-            fetcher = DownloadsFetcher(client_of_provider)
-        else:
-            exit(1)
+        fetchers = {}
+        for kind in kinds:
+            if kind == "views":
+                fetchers[kind] = ViewsFetcher(client_of_provider)
+            elif kind == "downloads":
+                fetchers[kind] = DownloadsFetcher(client_of_provider)
+            else:
+                exit(1)
+
+        windows = fetch_period_windows(
+            fetchers,
+            period,
+            concurrency,
+            days_per_request,
+            include=manifest.is_stale if resume else None,
+        )
+        writer = MonthlyFilesWriter(
+            output_dir,
+            manifest,
+            client_of_provider.failed_days,
+            compression=compression,
+            compact=compact,
+            merge=resume,
+            file_format=file_format,
+        )
+        try:
+            async for kind, yr_m, analytics in windows:
+                writer.write(kind, yr_m, analytics)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+
+        report_failures(client_of_provider.failures)
+        if response_cache:
+            print(
+                f"Response cache: {response_cache.hits} hit(s), "
+                f"{response_cache.misses} miss(es)"
+            )
+
+
+def report_failures(failures):
+    """Print requests that failed so their days can be retrieved again."""
+    if not failures:
+        return
 
-        async for yr_m, analytics in fetch_monthly_analytics(fetcher, period):
-            write_json(output_dir / f"{kind}_{yr_m}.json", analytics)
+    print(f"{len(failures)} request(s) failed. Re-run for their days:")
+    for failure in failures:
+        print(f"  {failure.method} {failure.date} : {failure.error}")
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Persistent store of looked up record metadata (SQLite).
+
+Parent pids, bucket ids, file ids and sizes of published records almost
+never change. The store keeps them across runs, so that only records missing
+from it (or expired) have to be looked up in OpenSearch/DB.
+
+Entries are dicts of a record:
+
+{
+    "parent_pid": "<pid of parent>",
+    "bucket_id": "<bucket id>",  # only with files
+    "files": [(<file key>, <file id>, <size>), ...],  # only with files
+}
+
+Pids that were looked up but not found (deleted records, mistyped or
+bot-generated ids...) are remembered as missing, for a shorter time since
+they could be published in the meantime. A Bloom filter of missing pids,
+saved along, tells most other pids apart without querying the store.
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+
+from flask import current_app
+
+from invenio_analytics_importer.bloom import BloomFilter
+
+DEFAULT_TTL = 30 * 24 * 60 * 60
+DEFAULT_MISSING_TTL = 7 * 24 * 60 * 60
+DEFAULT_MISSING_CAPACITY = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    pid TEXT PRIMARY KEY,
+    parent_pid TEXT NOT NULL,
+    bucket_id TEXT,
+    has_files INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    pid TEXT NOT NULL,
+    file_key TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (pid, file_key)
+);
+CREATE TABLE IF NOT EXISTS missing (
+    pid TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS missing_filter (
+    capacity INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    bits BLOB NOT NULL
+);
+"""
+
+# Stay below SQLite's (older) limit of 999 variables per statement
+CHUNK_SIZE = 500
+
+
+def chunked(items, size=CHUNK_SIZE):
+    """Yield lists of at most size items."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class LookupStore:
+    """Persistent store of record metadata with per-entry expiry."""
+
+    filename = "lookup.sqlite3"
+
+    def __init__(
+        self,
+        directory,
+        ttl=DEFAULT_TTL,
+        missing_ttl=DEFAULT_MISSING_TTL,
+        clock=time.time,
+    ):
+        """Constructor.
+
+        :param ttl: float. Seconds an entry is valid for.
+        :param missing_ttl: float. Seconds a pid is known to be missing for.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self._clock = clock
+        self._connection = sqlite3.connect(directory / self.filename)
+        self._connection.executescript(SCHEMA)
+        row = self._connection.execute(
+            "SELECT capacity, count, bits FROM missing_filter"
+        ).fetchone()
+        if row:
+            capacity, count, bits = row
+            self.missing_filter = BloomFilter(capacity, bits=bits, count=count)
+        else:
+            self.missing_filter = BloomFilter(DEFAULT_MISSING_CAPACITY)
+
+    def close(self):
+        """Close store."""
+        self._connection.close()
+
+    def load(self, pids, with_files=False):
+        """Return {pid: entry} of valid entries of pids.
+
+        With `with_files`, only entries saved with their files are returned.
+        """
+        entries = {}
+        now = self._clock()
+        for chunk in chunked(pids):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                "SELECT pid, parent_pid, bucket_id FROM records "
+                f"WHERE pid IN ({placeholders}) AND expires_at > ? "
+                "AND has_files >= ?",
+                [*chunk, now, int(with_files)],
+            )
+            for pid, parent_pid, bucket_id in rows:
+                entries[pid] = {"parent_pid": parent_pid}
+                if with_files:
+                    entries[pid].update(bucket_id=bucket_id, files=[])
+
+        if with_files:
+            for chunk in chunked(entries):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    "SELECT pid, file_key, file_id, size FROM files "
+                    f"WHERE pid IN ({placeholders})",
+                    chunk,
+                )
+                for pid, file_key, file_id, size in rows:
+                    entries[pid]["files"].append((file_key, file_id, size))
+
+        return entries
+
+    def save(self, entries, with_files=False):
+        """Save entries ({pid: entry}), valid for ttl from now."""
+        expires_at = self._clock() + self.ttl
+        with self._connection:
+            for pid, entry in entries.items():
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                    (
+                        pid,
+                        entry["parent_pid"],
+                        entry.get("bucket_id"),
+                        int(with_files),
+                        expires_at,
+                    ),
+                )
+                self._connection.execute(
+                    "DELETE FROM files WHERE pid = ?", (pid,)
+                )
+                self._connection.executemany(
+                    "INSERT INTO files VALUES (?, ?, ?, ?)",
+                    [(pid, *file) for file in entry.get("files", [])],
+                )
+
+    def load_missing(self, pids):
+        """Return set of pids known to be missing."""
+        # Most pids aren't missing: the filter rules them out in memory
+        candidates = [pid for pid in pids if pid in self.missing_filter]
+        missing = set()
+        now = self._clock()
+        for chunk in chunked(candidates):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                "SELECT pid FROM missing "
+                f"WHERE pid IN ({placeholders}) AND expires_at > ?",
+                [*chunk, now],
+            )
+            missing.update(pid for pid, in rows)
+        return missing
+
+    def save_missing(self, pids):
+        """Save pids as missing, for missing_ttl from now."""
+        pids = list(pids)
+        if not pids:
+            return
+        now = self._clock()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO missing VALUES (?, ?)",
+                [(pid, now + self.missing_ttl) for pid in pids],
+            )
+            for pid in pids:
+                self.missing_filter.add(pid)
+            if self.missing_filter.is_full():
+                self._rebuild_missing_filter(now)
+            self._save_missing_filter()
+
+    def _rebuild_missing_filter(self, now):
+        """Rebuild missing filter from valid missing pids, with room to grow.
+
+        Bloom filters can't remove values: expired pids are dropped here.
+        """
+        self._connection.execute(
+            "DELETE FROM missing WHERE expires_at <= ?", (now,)
+        )
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM missing"
+        ).fetchone()
+        self.missing_filter = BloomFilter(
+            max(DEFAULT_MISSING_CAPACITY, 2 * count)
+        )
+        for (pid,) in self._connection.execute("SELECT pid FROM missing"):
+            self.missing_filter.add(pid)
+
+    def _save_missing_filter(self):
+        """Save missing filter."""
+        self._connection.execute("DELETE FROM missing_filter")
+        self._connection.execute(
+            "INSERT INTO missing_filter VALUES (?, ?, ?)",
+            (
+                self.missing_filter.capacity,
+                self.missing_filter.count,
+                bytes(self.missing_filter.bits),
+            ),
+        )
+
+    def invalidate(self, pids=None):
+        """Remove entries of pids (all entries if None).
+
+        Pids are not known to be missing anymore either.
+        """
+        with self._connection:
+            if pids is None:
+                for table in ("records", "files", "missing", "missing_filter"):
+                    self._connection.execute(f"DELETE FROM {table}")
+                self.missing_filter = BloomFilter(DEFAULT_MISSING_CAPACITY)
+                return
+            for chunk in chunked(pids):
+                placeholders = ",".join("?" * len(chunk))
+                for table in ("records", "files", "missing"):
+                    self._connection.execute(
+                        f"DELETE FROM {table} WHERE pid IN ({placeholders})",
+                        chunk,
+                    )
+
+
+def get_lookup_store():
+    """Return LookupStore as configured (or None if not configured)."""
+    config = current_app.config
+    directory = config.get("ANALYTICS_IMPORTER_CACHE_DIR")
+    if not directory:
+        return None
+    return LookupStore(
+        directory,
+        ttl=config.get("ANALYTICS_IMPORTER_CACHE_TTL", DEFAULT_TTL),
+        missing_ttl=config.get(
+            "ANALYTICS_IMPORTER_CACHE_MISSING_TTL", DEFAULT_MISSING_TTL
+        ),
+    )
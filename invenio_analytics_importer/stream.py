@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Incremental parsing of JSON documents as they stream in.
+
+Only the shapes of provider responses are supported:
+
+- an array of items: [item, ...]
+- an object of arrays of items: {"key": [item, ...], ...}
+
+Items are decoded one at a time, so that only the current item (and not the
+whole document) has to be held in memory.
+"""
+
+import json
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JSONItemsDecoder:
+    """Incrementally decode (key, item) pairs of an array or object of arrays.
+
+    key is None for items of a top-level array. Non-array members of an
+    object are not items: they are kept in `members` (e.g., an error
+    message). A document that isn't an array or an object (e.g., a plain
+    text message) is kept in `text`.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+        self.is_object = False
+        self.members = {}
+        self.text = None
+
+    def _skip_whitespace(self):
+        """Move position past whitespace."""
+        while (
+            self._pos < len(self._buffer)
+            and self._buffer[self._pos] in _WHITESPACE
+        ):
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _decode_value(self):
+        """Decode a JSON value at position (or return False if incomplete)."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        if isinstance(value, (int, float)) and (
+            end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS
+        ):
+            # A number could be cut short: wait for what follows it
+            return False, None
+        self._pos = end
+        return True, value
+
+    def feed(self, text):
+        """Feed text and return list of newly decoded (key, item)."""
+        if self.text is not None:
+            self.text += text
+            return []
+
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items = []
+
+        while self._skip_whitespace():
+            char = self._buffer[self._pos]
+
+            if self._state == "start":
+                if char == "[":
+                    self._state = "items"
+                elif char == "{":
+                    self.is_object = True
+                    self._state = "members"
+                else:
+                    self.text = self._buffer[self._pos:]
+                    self._buffer = ""
+                    return items
+                self._pos += 1
+
+            elif self._state == "members":
+                if char == ",":
+                    self._pos += 1
+                elif char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    # key, colon and start of value must all be available
+                    start = self._pos
+                    complete, key = self._decode_value()
+                    colon = self._buffer.find(":", self._pos)
+                    if not complete or colon == -1:
+                        self._pos = start
+                        break
+                    self._pos = colon + 1
+                    if not self._skip_whitespace():
+                        self._pos = start
+                        break
+                    self._key = key
+                    if self._buffer[self._pos] == "[":
+                        self._pos += 1
+                        self._state = "items"
+                    else:
+                        self._state = "skip"
+
+            elif self._state == "skip":
+                complete, value = self._decode_value()
+                if not complete:
+                    break
+                self.members[self._key] = value
+                self._state = "members"
+
+            elif self._state == "items":
+                if char == ",":
+                    self._pos += 1
+                elif char == "]":
+                    self._pos += 1
+                    self._state = "members" if self.is_object else "done"
+                else:
+                    complete, item = self._decode_value()
+                    if not complete:
+                        break
+                    items.append((self._key, item))
+
+            else:  # done
+                raise ValueError("Extra data after JSON document.")
+
+        return items
+
+    def close(self):
+        """Check the document was complete."""
+        if self.text is None and self._state != "done":
+            raise ValueError("Incomplete JSON document.")
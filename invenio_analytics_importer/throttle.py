@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Throttling primitives: retries, rate limiting and adaptive concurrency."""
+
+import asyncio
+import dataclasses
+import random
+import time
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt):
+        """Return seconds to wait before given retry attempt (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Allows bursts of up to `capacity` requests and `rate` requests per second
+    on average.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """Constructor."""
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add tokens accumulated since last refill."""
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class AIMDController:
+    """Additive-increase/multiplicative-decrease controller of a value.
+
+    Each success increases the value so that it grows by ~`increase` per
+    "round" of `value` successes. Each overload multiplies it by `decrease`.
+    """
+
+    def __init__(self, initial, minimum, maximum, increase=1, decrease=0.5):
+        """Constructor."""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self._value = float(initial)
+
+    @property
+    def value(self):
+        """Current value."""
+        return int(self._value)
+
+    def on_success(self):
+        """Additively increase value."""
+        self._value = min(
+            self.maximum, self._value + self.increase / self._value
+        )
+
+    def on_overload(self):
+        """Multiplicatively decrease value."""
+        self._value = max(self.minimum, self._value * self.decrease)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limit concurrent operations to an AIMD-controlled limit.
+
+    The limit backs off when an operation reports overload or when latency
+    rises well above the lowest latency seen, and slowly grows back otherwise.
+    Decreases happen at most once per observed latency, so that a burst of
+    concurrent overloads counts as a single congestion event.
+    """
+
+    def __init__(
+        self,
+        maximum,
+        minimum=1,
+        latency_tolerance=2.0,
+        clock=time.monotonic,
+    ):
+        """Constructor."""
+        self.controller = AIMDController(maximum, minimum, maximum)
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._clock = clock
+        self._condition = asyncio.Condition()
+        self._latency = None
+        self._baseline_latency = None
+        self._last_decrease = None
+
+    @property
+    def limit(self):
+        """Current concurrency limit."""
+        return self.controller.value
+
+    async def __aenter__(self):
+        """Wait for a slot."""
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < self.limit
+            )
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Release slot."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _decrease(self):
+        """Decrease limit unless it was just decreased."""
+        now = self._clock()
+        window = self._latency or 0
+        if self._last_decrease is None or now - self._last_decrease > window:
+            self.controller.on_overload()
+            self._last_decrease = now
+
+    def on_success(self, latency):
+        """Record a successful operation that took `latency` seconds."""
+        # Exponentially weighted moving average smooths out single outliers
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency = 0.8 * self._latency + 0.2 * latency
+
+        if self._baseline_latency is None:
+            self._baseline_latency = self._latency
+        self._baseline_latency = min(self._baseline_latency, self._latency)
+
+        if self._latency > self.latency_tolerance * self._baseline_latency:
+            self._decrease()
+        else:
+            self.controller.on_success()
+
+    def on_overload(self):
+        """Record an operation rejected because of overload."""
+        self._decrease()
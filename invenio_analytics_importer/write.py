@@ -8,14 +8,26 @@
 
 """Write."""
 
+import collections
+import itertools
 import json
+import os
+
+from invenio_analytics_importer.compression import get_compression, open_text
+from invenio_analytics_importer.read import is_ndjson
 
 
 def write_json(
-    filepath, content, sort_keys=True, indent=2, separators=(",", ": "), **kwargs  # noqa
+    filepath,
+    content,
+    sort_keys=True,
+    indent=2,
+    separators=(",", ": "),
+    compression="infer",
+    **kwargs
 ):
-    """Write json filepath."""
-    with open(filepath, "w") as f:
+    """Write json filepath (compressed based on its extension by default)."""
+    with open_text(filepath, "w", compression=compression) as f:
         json.dump(
             content,
             f,
@@ -25,3 +37,143 @@ def write_json(
             **kwargs
         )
     return filepath
+
+
+class JSONObjectWriter:
+    """Write a JSON object to filepath one member at a time.
+
+    Members are written as they come, so they don't need to be held in memory
+    together. With the same (sorted) members, the output is the same as
+    write_json's (including compression based on extension). Content goes to
+    a temporary file until closed, so an interrupted write never leaves a
+    truncated file behind.
+
+    Members of `carry_over` (e.g., the current content of filepath) are
+    interleaved in key order, unless a member with the same key is written.
+    """
+
+    def __init__(self, filepath, indent=2, sort_keys=True, carry_over=None):
+        """Constructor."""
+        self.filepath = filepath
+        self.indent = indent
+        self.sort_keys = sort_keys
+        if indent is None:
+            self.separators = (",", ":")
+            self._newline = ""
+        else:
+            self.separators = (",", ": ")
+            self._newline = "\n" + " " * indent
+        self._tmp_filepath = f"{filepath}.part"
+        self._file = open_text(
+            self._tmp_filepath, "w", compression=get_compression(filepath)
+        )
+        self._empty = True
+        self._carry_over = collections.deque(
+            sorted((carry_over or {}).items())
+        )
+
+    def __enter__(self):
+        """Enter context."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Close (or abort on error)."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, key, value):
+        """Write key: value member."""
+        while self._carry_over and self._carry_over[0][0] <= key:
+            carried_key, carried_value = self._carry_over.popleft()
+            if carried_key != key:
+                self._write(carried_key, carried_value)
+        self._write(key, value)
+
+    def _write(self, key, value):
+        """Write key: value member to file."""
+        item_separator, key_separator = self.separators
+        self._file.write("{" if self._empty else item_separator)
+        self._file.write(self._newline)
+        encoded = json.dumps(
+            value,
+            sort_keys=self.sort_keys,
+            indent=self.indent,
+            separators=self.separators,
+        )
+        if self.indent is not None:
+            # Nest value one level deeper (JSON strings can't contain "\n")
+            encoded = encoded.replace("\n", self._newline)
+        self._file.write(json.dumps(key) + key_separator + encoded)
+        self._empty = False
+
+    def _write_end(self):
+        """Write end of file."""
+        if self._empty:
+            self._file.write("{}")
+        else:
+            self._file.write(self._newline[:1] + "}")
+
+    def close(self):
+        """Finish the object and move it to filepath."""
+        while self._carry_over:
+            self._write(*self._carry_over.popleft())
+        self._write_end()
+        self._file.close()
+        os.replace(self._tmp_filepath, self.filepath)
+        return self.filepath
+
+    def abort(self):
+        """Discard what was written."""
+        self._file.close()
+        os.remove(self._tmp_filepath)
+
+
+class NDJSONWriter(JSONObjectWriter):
+    """Write analytics to filepath in NDJSON format, one day at a time.
+
+    Each analytic of a day is written as a ["YYYY-MM-DD", analytic] line.
+    Otherwise, it works as JSONObjectWriter (days of `carry_over` are
+    interleaved, content goes to a temporary file until closed...).
+    """
+
+    def __init__(self, filepath, sort_keys=True, carry_over=None, **kwargs):
+        """Constructor."""
+        super().__init__(
+            filepath, indent=None, sort_keys=sort_keys, carry_over=carry_over
+        )
+
+    def _write(self, key, value):
+        """Write a line per analytic of value."""
+        for analytic in value:
+            self._file.write(
+                json.dumps(
+                    [key, analytic],
+                    sort_keys=self.sort_keys,
+                    separators=self.separators,
+                )
+            )
+            self._file.write("\n")
+
+    def _write_end(self):
+        """Write end of file (nothing to write)."""
+
+
+def get_analytics_writer(filepath, **kwargs):
+    """Return writer of analytics to filepath (format based on extension)."""
+    if is_ndjson(filepath):
+        return NDJSONWriter(filepath, **kwargs)
+    return JSONObjectWriter(filepath, **kwargs)
+
+
+def write_raw_analytics(filepath, raw_analytics, **kwargs):
+    """Write (YYYY-MM-DD, analytic) of raw_analytics to filepath.
+
+    raw_analytics are expected grouped by day (as they are read). The format
+    and compression are based on the extension of filepath.
+    """
+    with get_analytics_writer(filepath, **kwargs) as writer:
+        for day, group in itertools.groupby(raw_analytics, key=lambda a: a[0]):
+            writer.write(day, [analytic for _, analytic in group])
+    return filepath
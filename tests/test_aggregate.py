@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import pytest
+
+import invenio_analytics_importer.aggregate as aggregate_module
+from invenio_analytics_importer.aggregate import (
+    aggregate_analytics,
+    aggregate_analytics_by_day,
+)
+from invenio_analytics_importer.convert import (
+    DownloadAnalytics,
+    ViewAnalytics,
+    generate_view_analytics,
+)
+
+
+def test_aggregate_view_analytics():
+    raw_analytics = [
+        ("2024-08-01", {"label": label, "nb_hits": 2, "nb_visits": 1})
+        for label in (
+            "example.org/records/3s45v-k5m55",
+            "/records/3s45v-k5m55/",
+            "www.example.org/records/3s45v-k5m55?ln=en",
+            "/records/y4dqk-7yj30",
+        )
+    ]
+    analytics = list(generate_view_analytics(raw_analytics))
+
+    aggregated = list(aggregate_analytics(analytics))
+
+    assert [
+        ViewAnalytics("2024-08-01", "3s45v-k5m55", visits=3, views=6),
+        ViewAnalytics("2024-08-01", "y4dqk-7yj30", visits=1, views=2),
+    ] == aggregated
+    # Input is left untouched
+    assert 2 == analytics[0].views
+
+
+@pytest.mark.parametrize("max_entries", [1, 3, 1000])
+def test_aggregate_download_analytics_with_spill(max_entries):
+    analytics = [
+        DownloadAnalytics(f"2024-08-0{day}", pid, key, visits=1, views=2)
+        for _ in range(3)
+        for day in (1, 2)
+        for pid in ("a", "b")
+        for key in ("x.txt", "y.txt")
+    ]
+
+    aggregated = list(
+        aggregate_analytics(analytics, max_entries=max_entries, partitions=3)
+    )
+
+    assert 8 == len(aggregated)
+    assert {(a.visits, a.views) for a in aggregated} == {(3, 6)}
+    assert 8 == len(
+        {(a.year_month_day, a.pid, a.file_key) for a in aggregated}
+    )
+
+
+def test_aggregate_analytics_bounds_partitions(monkeypatch):
+    sizes = []
+    merge_into = aggregate_module.merge_into
+
+    def tracked_merge_into(merged, analytic):
+        merge_into(merged, analytic)
+        sizes.append(len(merged))
+
+    monkeypatch.setattr(aggregate_module, "merge_into", tracked_merge_into)
+    analytics = [
+        ViewAnalytics("2024-08-01", f"{pid:05}-00000", visits=1, views=2)
+        for _ in range(2)
+        for pid in range(200)
+    ]
+
+    # Way more distinct keys than partitions * max_entries
+    aggregated = list(
+        aggregate_analytics(analytics, max_entries=5, partitions=2)
+    )
+
+    assert 200 == len(aggregated)
+    assert {(a.visits, a.views) for a in aggregated} == {(2, 4)}
+    assert max(sizes) <= 5 + 1
+
+
+def test_aggregate_analytics_by_day_streams():
+    consumed = []
+
+    def generate_analytics():
+        for day in ("2024-08-01", "2024-08-02", "2024-08-03"):
+            for pid in ("a", "b", "a"):
+                consumed.append(day)
+                yield ViewAnalytics(day, pid, visits=1, views=2)
+
+    aggregated = aggregate_analytics_by_day(generate_analytics())
+    first = next(aggregated)
+
+    assert ViewAnalytics("2024-08-01", "a", visits=2, views=4) == first
+    # Only the first day (and the start of the next) was read
+    assert ["2024-08-01"] * 3 + ["2024-08-02"] == consumed
+    assert 6 == 1 + len(list(aggregated))
+
+
+@pytest.mark.parametrize("max_entries", [0, -1])
+def test_aggregate_analytics_rejects_max_entries_below_1(max_entries):
+    analytics = [ViewAnalytics("2024-08-01", "a", visits=1, views=1)]
+
+    with pytest.raises(ValueError):
+        list(aggregate_analytics(analytics, max_entries=max_entries))
+
+
+def test_aggregate_analytics_by_day_rejects_scattered_day():
+    analytics = [
+        ViewAnalytics(day, "a", visits=1, views=1)
+        for day in ("2024-08-01", "2024-08-02", "2024-08-01")
+    ]
+
+    with pytest.raises(ValueError):
+        list(aggregate_analytics_by_day(analytics))
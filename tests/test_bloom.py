@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+from invenio_analytics_importer.bloom import BloomFilter
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    added = [f"{i:05}-added" for i in range(1000)]
+    for value in added:
+        bloom.add(value)
+
+    assert all(value in bloom for value in added)
+    others = [f"{i:05}-other" for i in range(10000)]
+    false_positives = sum(value in bloom for value in others)
+    assert false_positives < 0.02 * len(others)
+    assert not bloom.is_full()
+    bloom.add("one-too-many")
+    assert bloom.is_full()
+
+
+def test_bloom_filter_from_bits():
+    bloom = BloomFilter(100)
+    bloom.add("3s45v-k5m55")
+
+    copy = BloomFilter(100, bits=bytes(bloom.bits), count=bloom.count)
+
+    assert "3s45v-k5m55" in copy
+    assert 1 == copy.count
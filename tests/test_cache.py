@@ -6,16 +6,29 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 
+from unittest import mock
+
+import flask
 import pytest
 
+import invenio_analytics_importer.cache as cache_module
+from invenio_analytics_importer.aggregate import merge_by_day
 from invenio_analytics_importer.cache import (
+    Cache,
+    CompactCache,
+    fill_cache,
     fill_downloads_cache,
     fill_views_cache,
+    get_lookup,
+    iter_windows,
+    scan_records,
 )
 from invenio_analytics_importer.convert import DownloadAnalytics, ViewAnalytics
+from invenio_analytics_importer.store import LookupStore
 
 
-def test_fill_downloads_cache(running_app, db, record_factory):
+@pytest.mark.parametrize("backend", ["search", "db"])
+def test_fill_downloads_cache(running_app, db, record_factory, backend):
     file_key = "coffee.assess.nobmi.txt"
     r = record_factory.create_record(filenames=[file_key])
     r.index.refresh()
@@ -37,7 +50,7 @@ def test_fill_downloads_cache(running_app, db, record_factory):
         ),
     ]
 
-    cache = fill_downloads_cache(iter_analytics)
+    cache = fill_downloads_cache(iter_analytics, backend=backend)
 
     file_model = r.files[file_key].file.file_model
     file_id = cache.get_file_id(pid, file_key)
@@ -52,7 +65,8 @@ def test_fill_downloads_cache(running_app, db, record_factory):
         cache.get_file_id("notin-cache", "doesnt_exist.txt")
 
 
-def test_fill_views_cache(running_app, db, record_factory):
+@pytest.mark.parametrize("backend", ["search", "db"])
+def test_fill_views_cache(running_app, db, record_factory, backend):
     r = record_factory.create_record()
     r.index.refresh()
     pid = r.pid.pid_value
@@ -71,8 +85,274 @@ def test_fill_views_cache(running_app, db, record_factory):
         ),
     ]
 
-    cache = fill_views_cache(iter_analytics)
+    cache = fill_views_cache(iter_analytics, backend=backend)
 
     assert r.parent.pid.pid_value == cache.get_parent_pid(pid)
     with pytest.raises(KeyError):
         cache.get_parent_pid("notin-cache")
+
+
+def test_fill_cache_from_store(tmp_path):
+    # Everything is in the store: OpenSearch/DB are not queried
+    store = LookupStore(tmp_path)
+    store.save(
+        {
+            "3s45v-k5m55": {
+                "parent_pid": "abcde-fghij",
+                "bucket_id": "b1",
+                "files": [("a.txt", "f1", 12)],
+            },
+        },
+        with_files=True,
+    )
+    analytics = [DownloadAnalytics("2024-09-03", "3s45v-k5m55", "a.txt", 2, 3)]
+
+    cache = fill_downloads_cache(analytics, store)
+
+    assert "abcde-fghij" == cache.get_parent_pid("3s45v-k5m55")
+    assert "b1" == cache.get_bucket_id("3s45v-k5m55")
+    assert "f1" == cache.get_file_id("3s45v-k5m55", "a.txt")
+    assert 12 == cache.get_size("f1")
+
+    cache = fill_views_cache(analytics, store)
+
+    assert "abcde-fghij" == cache.get_parent_pid("3s45v-k5m55")
+
+
+def test_fill_cache_skips_missing_pids(tmp_path):
+    looked_up = []
+
+    def lookup_entries(pids):
+        looked_up.append(set(pids))
+        return {"3s45v-k5m55": {"parent_pid": "abcde-fghij"}}
+
+    analytics = [
+        ViewAnalytics("2024-09-03", "3s45v-k5m55", 2, 3),
+        ViewAnalytics("2024-09-03", "n0t-a-rec0rd", 1, 1),
+    ]
+    store = LookupStore(tmp_path)
+
+    cache = fill_cache(analytics, lookup_entries, store)
+    cache = fill_cache(analytics, lookup_entries, store)
+
+    # The second time, the record is stored and the other pid known missing
+    assert [{"3s45v-k5m55", "n0t-a-rec0rd"}] == looked_up
+    assert cache.has_record("3s45v-k5m55")
+    assert not cache.has_record("n0t-a-rec0rd")
+
+
+def test_get_lookup():
+    assert (cache_module.lookup_views_entries, False) == get_lookup("views")
+    assert (
+        cache_module.lookup_downloads_entries_from_db,
+        True,
+    ) == get_lookup("downloads", "db")
+    # Views and downloads together need what downloads need
+    assert get_lookup("downloads") == get_lookup("all")
+
+
+def test_iter_windows():
+    looked_up = []
+
+    def lookup_entries(pids):
+        looked_up.append(set(pids))
+        return {
+            pid: {"parent_pid": f"parent-{pid}"}
+            for pid in pids
+            if pid != "missing"
+        }
+
+    pids = ["a", "b", "missing", "a", "c", "b", "a", "b"]
+    analytics = (ViewAnalytics("2024-09-03", pid, 1, 1) for pid in pids)
+
+    windows = iter_windows(
+        analytics, lookup_entries, window_size=3, max_resolved=3
+    )
+    window, cache = next(windows)
+
+    # The first window is available before the rest is consumed
+    assert ["a", "b", "missing"] == [a.pid for a in window]
+    assert [{"a", "b", "missing"}] == looked_up
+    assert "parent-a" == cache.get_parent_pid("a")
+    assert not cache.has_record("missing")
+
+    window, cache = next(windows)
+    # Only "c" is new
+    assert ["a", "c", "b"] == [a.pid for a in window]
+    assert {"c"} == looked_up[-1]
+    assert cache.has_record("b") and cache.has_record("c")
+
+    window, cache = next(windows)
+    # "missing", least recently used, was evicted but "a" and "b" weren't
+    assert ["a", "b"] == [a.pid for a in window]
+    assert 2 == len(looked_up)
+    assert not cache.has_record("c")
+    assert [] == list(windows)
+
+
+def test_iter_windows_of_days_merged_by_kind():
+    looked_up = []
+
+    def lookup_entries(pids):
+        looked_up.extend(pids)
+        return {pid: {"parent_pid": "abcde-fghij"} for pid in pids}
+
+    def generate(cls, *args):
+        return [
+            cls(f"2024-08-0{day}", f"{day}-{i}", *args, 1, 1)
+            for day in range(1, 4)
+            for i in range(4)
+        ]
+
+    def count_lookups(analytics):
+        looked_up.clear()
+        windows = iter_windows(
+            analytics, lookup_entries, window_size=4, max_resolved=8
+        )
+        for _ in windows:
+            pass
+        return len(looked_up)
+
+    views = generate(ViewAnalytics)
+    downloads = generate(DownloadAnalytics, "a.txt")
+
+    # Each of the 12 records is looked up once, though only 8 are kept
+    assert 12 == count_lookups(merge_by_day(views, downloads))
+    assert 12 < count_lookups(views + downloads)
+
+
+BUCKET_ID = "0b7a4c5e-2a2f-4b0e-9a59-8d1f3e6a2c11"
+FILE_ID_A = "5e2b0f3c-8c1d-4e7a-b1f0-6a9d2c3b4e51"
+FILE_ID_B = "9c4d1e2f-3a5b-4c6d-8e7f-0a1b2c3d4e5f"
+FILE_ID_C = "2f6e8a0b-4c1d-4e3f-a5b7-c9d1e3f5a7b9"
+
+
+@pytest.mark.parametrize("cache_cls", [Cache, CompactCache])
+def test_cache_get_set(cache_cls):
+    cache = cache_cls()
+    cache.set_parent_pid("3s45v-k5m55", "abcde-fghij")
+    cache.set_bucket_id("3s45v-k5m55", BUCKET_ID)
+    cache.set_file_id("3s45v-k5m55", "a.txt", FILE_ID_A)
+    cache.set_size(FILE_ID_A, 12)
+    cache.set_file_id("3s45v-k5m55", "b.txt", FILE_ID_B)
+    cache.set_size(FILE_ID_B, 34)
+    cache.set_file_id("3s45v-k5m55", "c.txt", FILE_ID_C)
+    cache.set_size(FILE_ID_C, 56)
+    cache.set_parent_pid("7n8p9-q0r1s", "abcde-fghij")
+
+    assert cache.has_record("3s45v-k5m55")
+    assert not cache.has_record("unknown")
+    assert cache.has_file("3s45v-k5m55", "b.txt")
+    assert cache.has_file("3s45v-k5m55", "c.txt")
+    assert not cache.has_file("3s45v-k5m55", "d.txt")
+    assert not cache.has_file("7n8p9-q0r1s", "a.txt")
+    assert not cache.has_file("unknown", "a.txt")
+    assert "abcde-fghij" == cache.get_parent_pid("3s45v-k5m55")
+    assert "abcde-fghij" == cache.get_parent_pid("7n8p9-q0r1s")
+    assert BUCKET_ID == cache.get_bucket_id("3s45v-k5m55")
+    assert FILE_ID_A == cache.get_file_id("3s45v-k5m55", "a.txt")
+    assert FILE_ID_B == cache.get_file_id("3s45v-k5m55", "b.txt")
+    assert FILE_ID_C == cache.get_file_id("3s45v-k5m55", "c.txt")
+    # Sizes are found whether or not their file id was just looked up
+    assert 12 == cache.get_size(FILE_ID_A)
+    assert 34 == cache.get_size(FILE_ID_B)
+    assert 56 == cache.get_size(FILE_ID_C)
+    assert 0 == cache.get_size("00000000-0000-0000-0000-000000000000")
+    with pytest.raises(KeyError):
+        cache.get_parent_pid("unknown")
+    with pytest.raises(KeyError):
+        cache.get_bucket_id("7n8p9-q0r1s")
+    with pytest.raises(KeyError):
+        cache.get_file_id("3s45v-k5m55", "d.txt")
+    with pytest.raises(KeyError):
+        cache.get_file_id("7n8p9-q0r1s", "a.txt")
+
+
+def test_compact_cache_from_store(tmp_path):
+    store = LookupStore(tmp_path)
+    store.save(
+        {
+            "3s45v-k5m55": {
+                "parent_pid": "abcde-fghij",
+                "bucket_id": BUCKET_ID,
+                "files": [("a.txt", FILE_ID_A, 12)],
+            },
+        },
+        with_files=True,
+    )
+    analytics = [DownloadAnalytics("2024-09-03", "3s45v-k5m55", "a.txt", 2, 3)]
+
+    cache = fill_downloads_cache(analytics, store, cache_cls=CompactCache)
+
+    assert isinstance(cache, CompactCache)
+    assert BUCKET_ID == cache.get_bucket_id("3s45v-k5m55")
+    assert 12 == cache.get_size(cache.get_file_id("3s45v-k5m55", "a.txt"))
+
+
+class FakeSearch:
+    """Fake search, looking up documents of the fake client."""
+
+    def __init__(self, using, index):
+        """Constructor."""
+        self.client = using
+        self.pids = None
+        self.fields = None
+
+    def filter(self, query):
+        """Filter by terms query."""
+        self.pids = query["terms"]["id"]
+        return self
+
+    def source(self, fields):
+        """Restrict source."""
+        self.fields = fields
+        return self
+
+    def scan(self):
+        """Scan documents."""
+        self.client.searches.append((self.pids, self.fields))
+        return [
+            {"id": pid, "parent": {"id": f"parent-{pid}"}}
+            for pid in self.pids
+            if pid in self.client.pids
+        ]
+
+
+class FakeSearchClient:
+    """Fake search client."""
+
+    def __init__(self, pids):
+        """Constructor."""
+        self.pids = pids
+        self.searches = []
+
+    def _get_current_object(self):
+        """Return itself (like a proxy)."""
+        return self
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_scan_records_by_chunks(monkeypatch, workers):
+    client = FakeSearchClient({f"pid-{i}" for i in range(0, 25, 2)})
+    monkeypatch.setattr(cache_module, "current_search_client", client)
+    monkeypatch.setattr(cache_module.dsl, "Search", FakeSearch)
+    app = flask.Flask(__name__)
+    app.config.update(
+        ANALYTICS_IMPORTER_SEARCH_CHUNK_SIZE=10,
+        ANALYTICS_IMPORTER_SEARCH_WORKERS=workers,
+    )
+    record_cls = mock.Mock(**{"index.search_alias": "records"})
+    pids = [f"pid-{i}" for i in range(25)]
+
+    with app.app_context():
+        hits = list(
+            scan_records(record_cls, pids, cache_module.VIEWS_FIELDS)
+        )
+
+    assert sorted(client.pids) == sorted(hit["id"] for hit in hits)
+    assert [10, 10, 5] == sorted(
+        (len(pids) for pids, _ in client.searches), reverse=True
+    )
+    assert {("id", "parent.id")} == {
+        tuple(fields) for _, fields in client.searches
+    }
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import pytest
+from click.testing import CliRunner
+
+from invenio_analytics_importer.cli import ingest
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--views", "--views-filepath", "{fp}"],
+        ["--downloads", "--downloads-filepath", "{fp}"],
+        ["--all", "-f", "{fp}"],
+    ],
+)
+def test_ingest_rejects_filepaths_of_other_mode(tmp_path, args):
+    filepath = tmp_path / "views_2024-08.json"
+    filepath.write_text("{}")
+
+    result = CliRunner().invoke(
+        ingest, [arg.format(fp=filepath) for arg in args]
+    )
+
+    assert 2 == result.exit_code
+    assert "Usage" in result.output
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import pytest
+
+from invenio_analytics_importer.columnar import read_columnar, write_columnar
+from invenio_analytics_importer.convert import (
+    DownloadAnalytics,
+    ViewAnalytics,
+    generate_analytics_from_filepaths,
+)
+from invenio_analytics_importer.write import write_json
+
+
+def test_columnar_roundtrip_of_downloads(tmp_path):
+    analytics = [
+        DownloadAnalytics("2024-08-01", "3s45v-k5m55", "a b.txt", 1, 2),
+        DownloadAnalytics("2024-08-01", "y4dqk-7yj30", "a b.txt", 3, 2**40),
+        DownloadAnalytics("2024-08-02", "3s45v-k5m55", "c.csv", 5, 6),
+    ]
+
+    fp = write_columnar(tmp_path / "downloads.iac", "downloads", analytics)
+    kind, rows = read_columnar(fp)
+
+    assert "downloads" == kind
+    assert analytics == [DownloadAnalytics(*fields) for fields in rows]
+
+
+def test_columnar_empty(tmp_path):
+    fp = write_columnar(tmp_path / "views.iac", "views", [])
+    kind, rows = read_columnar(fp)
+
+    assert "views" == kind
+    assert [] == list(rows)
+
+
+def test_columnar_not_columnar(tmp_path):
+    fp = write_json(tmp_path / "views.iac", {})
+
+    with pytest.raises(ValueError):
+        read_columnar(fp)
+
+
+def test_generate_analytics_from_columnar_filepaths(tmp_path):
+    raw_fp = write_json(
+        tmp_path / "views_2024-08.json",
+        {
+            "2024-08-01": [
+                {"label": "/records/3s45v-k5m55", "nb_hits": 4, "nb_visits": 3},  # noqa
+                {"label": "/", "nb_hits": 1, "nb_visits": 1},
+            ],
+            "2024-08-02": [
+                {"label": "/records/y4dqk-7yj30", "nb_hits": 1, "nb_visits": 1}
+            ],
+        },
+    )
+    analytics = list(generate_analytics_from_filepaths("views", [raw_fp]))
+    fp = write_columnar(tmp_path / "views_2024-08.iac", "views", analytics)
+
+    from_columnar = list(generate_analytics_from_filepaths("views", [fp]))
+
+    assert [
+        ViewAnalytics("2024-08-01", "3s45v-k5m55", 3, 4),
+        ViewAnalytics("2024-08-02", "y4dqk-7yj30", 1, 1),
+    ] == from_columnar == analytics
+    with pytest.raises(ValueError):
+        list(generate_analytics_from_filepaths("downloads", [fp]))
@@ -6,12 +6,19 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 
+from concurrent.futures import Future
+
 import pytest
 
+import invenio_analytics_importer.convert as convert_module
 from invenio_analytics_importer.convert import (
+    LabelCache,
+    generate_analytics_from_filepaths,
     generate_download_analytics,
     generate_view_analytics,
+    parse_label,
 )
+from invenio_analytics_importer.write import write_json
 
 
 @pytest.fixture
@@ -193,3 +200,143 @@ def test_generate_view_analytics(
     assert 3 == entry.visits
     assert 4 == entry.views
     assert "2024-08-30" == entry.year_month_day
+
+
+@pytest.mark.parametrize("kind", ["views", "downloads"])
+def test_generate_analytics_from_filepaths_with_workers(tmp_path, kind):
+    filepaths = [
+        write_json(
+            tmp_path / f"{kind}_2024-{month:02}.json",
+            {
+                f"2024-{month:02}-01": [
+                    {
+                        "label": f"/records/{month}{i}/files/a.txt?download=1",
+                        "nb_hits": i,
+                        "nb_visits": 1,
+                    }
+                    for i in range(3)
+                ]
+            },
+        )
+        for month in range(1, 6)
+    ]
+
+    sequential = list(generate_analytics_from_filepaths(kind, filepaths))
+    label_cache = LabelCache()
+    parallel = list(
+        generate_analytics_from_filepaths(kind, filepaths, 3, label_cache)
+    )
+
+    assert 15 == len(sequential)
+    assert sequential == parallel
+    assert 15 == label_cache.misses
+    assert "10" == parallel[0].pid
+    assert "52" == parallel[-1].pid
+
+
+class FakeExecutor:
+    """Executor running submitted calls right away, keeping track of them."""
+
+    submitted = []
+
+    def __init__(self, max_workers, initializer, initargs):
+        """Constructor."""
+        initializer(*initargs)
+
+    def __enter__(self):
+        """Enter."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Exit."""
+
+    def submit(self, fn, *args):
+        """Run fn."""
+        self.submitted.append(args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_generate_analytics_from_filepaths_bounds_lookahead(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(convert_module, "ProcessPoolExecutor", FakeExecutor)
+    monkeypatch.setattr(FakeExecutor, "submitted", [])
+    filepaths = [
+        write_json(
+            tmp_path / f"views_2024-{month:02}.json",
+            {f"2024-{month:02}-01": [{"label": f"/records/{month}"}]},
+        )
+        for month in range(1, 13)
+    ]
+
+    analytics = generate_analytics_from_filepaths("views", filepaths, 2)
+
+    for consumed, _ in enumerate(analytics, 1):
+        # Files submitted but not yielded yet
+        assert len(FakeExecutor.submitted) - consumed <= 2 * 2
+    assert 12 == len(FakeExecutor.submitted)
+
+
+@pytest.mark.parametrize(
+    "label,expected",
+    [
+        ("/", (None, None, None)),
+        ("example.org/records/", (None, None, None)),
+        ("example.org/search?q=records", (None, None, None)),
+        ("/records/3s45v-k5m55", ("record", "3s45v-k5m55", None)),
+        ("/records/3s45v-k5m55?ln=en#files", ("record", "3s45v-k5m55", None)),
+        (
+            "example.org/records/3s45v-k5m55/preview/a.wav",
+            ("record", "3s45v-k5m55", None),
+        ),
+        (
+            "example.org/records/3s45v-k5m55/files/a.txt?preview=1",
+            ("record", "3s45v-k5m55", None),
+        ),
+        (
+            "example.org/records/3s45v-k5m55/files/a.txt?download=1",
+            ("download", "3s45v-k5m55", "a.txt"),
+        ),
+        (
+            "example.org/records/3s45v-k5m55/files/PNB%207%2076.txt?download=1",  # noqa
+            ("download", "3s45v-k5m55", "PNB 7 76.txt"),
+        ),
+        (
+            "example.org/records/3s45v-k5m55/files/PNB 7 76.txt?download=1",
+            ("download", "3s45v-k5m55", "PNB 7 76.txt"),
+        ),
+        (
+            "example.org/records/3s45v-k5m55/files/a.txt?ln=en&download=1&x=y",
+            ("download", "3s45v-k5m55", "a.txt"),
+        ),
+    ],
+)
+def test_parse_label(label, expected):
+    assert expected == tuple(parse_label(label))
+
+
+def test_label_cache():
+    label_cache = LabelCache(maxsize=2)
+    raw_analytics = [
+        (f"2024-08-0{day}", {"label": label, "nb_hits": 1, "nb_visits": 1})
+        for day in range(1, 4)
+        for label in ("/records/a", "/records/b/files/c?download=1", "/")
+    ]
+
+    analytics = list(
+        generate_view_analytics(raw_analytics, label_cache.parse)
+    )
+
+    assert ["a", "b"] * 3 == [a.pid for a in analytics]
+    # 3 distinct labels don't fit in 2 entries: LRU evicts all of them
+    assert 0 == label_cache.hits
+    assert 0.0 == label_cache.hit_rate
+
+    label_cache = LabelCache(maxsize=3)
+    list(generate_download_analytics(raw_analytics, label_cache.parse))
+
+    assert 6 == label_cache.hits
+    assert 3 == label_cache.misses
+    assert pytest.approx(2 / 3) == label_cache.hit_rate
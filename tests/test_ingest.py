@@ -8,17 +8,22 @@
 
 import datetime as dt
 
+import pytest
 import time_machine
 from invenio_search import current_search_client
-from invenio_search.engine import dsl
+from invenio_search.engine import dsl, search
 
+import invenio_analytics_importer.ingest as ingest_module
 from invenio_analytics_importer.cache import Cache
 from invenio_analytics_importer.convert import DownloadAnalytics, ViewAnalytics
 from invenio_analytics_importer.ingest import (
     generate_download_stats,
+    generate_stats,
     generate_view_stats,
     ingest_statistics,
+    send_chunk,
 )
+from invenio_analytics_importer.throttle import RetryPolicy
 
 
 def test_generate_download_stats():
@@ -123,6 +128,145 @@ def test_generate_view_stats():
     assert expected == stats[0]
 
 
+def test_generate_stats_of_views_and_downloads():
+    cache = Cache()
+    cache.set_file_id("5ret9-dwz86", "coffee.txt", "f1")
+    cache.set_bucket_id("5ret9-dwz86", "b1")
+    cache.set_parent_pid("5ret9-dwz86", "tb2gj-axd97")
+    views = [
+        ViewAnalytics("2024-08-30", "5ret9-dwz86", 2, 3),
+        ViewAnalytics("2024-08-30", "notin-cache", 1, 1),
+    ]
+    downloads = [
+        DownloadAnalytics("2024-08-30", "5ret9-dwz86", "coffee.txt", 1, 1),
+        DownloadAnalytics("2024-08-30", "5ret9-dwz86", "missing.txt", 1, 1),
+    ]
+
+    pit = dt.datetime(2025, 9, 23, 0, 0, 0, tzinfo=dt.timezone.utc)
+    with time_machine.travel(pit, tick=False):
+        stats = list(generate_stats(views + downloads, cache))
+        expected = list(generate_view_stats(views, cache)) + list(
+            generate_download_stats(downloads, cache)
+        )
+
+    assert 2 == len(stats)
+    assert expected == stats
+
+
+class FakeBulk:
+    """Fake bulk helper, rejecting what it's told to."""
+
+    def __init__(self, rejected_requests=0, rejected_ids=(), failed_ids=()):
+        """Constructor."""
+        self.rejected_requests = rejected_requests
+        self.rejected_ids = set(rejected_ids)
+        self.failed_ids = set(failed_ids)
+        self.chunks = []
+        self.kwargs = []
+
+    def __call__(self, client, actions, **kwargs):
+        """Index actions."""
+        actions = list(actions)
+        self.chunks.append([a["_id"] for a in actions])
+        self.kwargs.append(kwargs)
+        if self.rejected_requests:
+            self.rejected_requests -= 1
+            raise search.exceptions.TransportError(429, "rejected", {})
+
+        errors = []
+        for action in actions:
+            if action["_id"] in self.failed_ids:
+                errors.append({"index": {**action, "status": 400}})
+            elif action["_id"] in self.rejected_ids:
+                # Rejected only once
+                self.rejected_ids.discard(action["_id"])
+                errors.append({"index": {**action, "status": 429}})
+        return len(actions) - len(errors), errors
+
+
+class FakeSearchClient:
+    """Fake search client."""
+
+    def _get_current_object(self):
+        """Return itself (like a proxy)."""
+        return self
+
+
+@pytest.fixture()
+def fake_bulk(monkeypatch):
+    bulk = FakeBulk()
+    monkeypatch.setattr(ingest_module.search.helpers, "bulk", bulk)
+    monkeypatch.setattr(
+        ingest_module, "current_search_client", FakeSearchClient()
+    )
+    return bulk
+
+
+def make_actions(number):
+    return [{"_index": "stats", "_id": str(i)} for i in range(number)]
+
+
+def test_send_chunk_retries_rejected_documents(fake_bulk):
+    fake_bulk.rejected_ids = {"1"}
+    policy = RetryPolicy(base_delay=0)
+
+    indexed, rejected, _ = send_chunk(None, make_actions(3), 100, policy)
+
+    assert 3 == indexed
+    assert rejected
+    assert [["0", "1", "2"], ["1"]] == fake_bulk.chunks
+
+
+def test_send_chunk_raises_on_failed_documents(fake_bulk):
+    fake_bulk.failed_ids = {"1"}
+
+    with pytest.raises(search.helpers.BulkIndexError):
+        send_chunk(None, make_actions(3), 100, RetryPolicy(base_delay=0))
+
+
+def test_ingest_statistics_in_one_thread(fake_bulk):
+    indexed = ingest_statistics(
+        iter(make_actions(10)), chunk_size=4, max_chunk_bytes=100
+    )
+
+    # Chunks are left to the bulk helper
+    assert 10 == indexed
+    assert 1 == len(fake_bulk.chunks)
+    assert 4 == fake_bulk.kwargs[0]["chunk_size"]
+    assert 100 == fake_bulk.kwargs[0]["max_chunk_bytes"]
+
+
+@pytest.mark.parametrize("threads", [2, 3])
+def test_ingest_statistics_by_chunks(fake_bulk, threads):
+    indexed = ingest_statistics(
+        iter(make_actions(10)), chunk_size=4, threads=threads
+    )
+
+    assert 10 == indexed
+    assert [4, 4, 2] == sorted(
+        (len(c) for c in fake_bulk.chunks), reverse=True
+    )
+
+
+def test_ingest_statistics_adapts_chunk_sizes(fake_bulk, monkeypatch):
+    monkeypatch.setattr(
+        ingest_module, "RetryPolicy", lambda: RetryPolicy(base_delay=0)
+    )
+    fake_bulk.rejected_requests = 1
+
+    indexed = ingest_statistics(
+        make_actions(100), chunk_size=20, adaptive=True
+    )
+
+    assert 100 == indexed
+    sizes = [len(c) for c in fake_bulk.chunks]
+    # The rejected chunk is retried and the next one is halved, then chunks
+    # grow back by ~10% of the initial size
+    assert [20, 20, 10] == sizes[:3]
+    assert sizes[3:-1] == sorted(set(sizes[3:-1]))
+    assert 10 < sizes[-2] < 20
+
+
 def test_ingest_statistics(running_app):
     stats_for_ingest = [
         {
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import datetime as dt
+
+from invenio_analytics_importer.manifest import Manifest
+
+
+def test_manifest_record_save_and_load(tmp_path):
+    manifest = Manifest.load(tmp_path)
+    fetched_at = dt.datetime(2024, 9, 2, tzinfo=dt.timezone.utc)
+
+    manifest.record(
+        "views", "2024-08-01", [{"label": "/records/3s45v-k5m55"}], fetched_at
+    )
+    manifest.save()
+
+    entry = Manifest.load(tmp_path).entries["views"]["2024-08-01"]
+    assert "2024-09-02T00:00:00+00:00" == entry["fetched_at"]
+    assert 1 == entry["rows"]
+    assert 64 == len(entry["sha256"])
+
+
+def test_manifest_is_stale():
+    manifest = Manifest(None)
+    fetched_at = dt.datetime(2024, 8, 2, 12, tzinfo=dt.timezone.utc)
+    manifest.record("views", "2024-07-31", [], fetched_at)
+    manifest.record("views", "2024-08-01", [], fetched_at)
+
+    assert manifest.is_complete("views", "2024-07-31")
+    # Fetched too close to the day
+    assert manifest.is_stale("views", "2024-08-01")
+    # Never fetched
+    assert manifest.is_stale("views", "2024-08-02")
+    assert manifest.is_stale("downloads", "2024-07-31")
+
+
+def test_manifest_get_since_last_period():
+    manifest = Manifest(None)
+    fetched_at = dt.datetime(2024, 9, 2, tzinfo=dt.timezone.utc)
+    manifest.record("views", "2024-06-30", [], fetched_at)
+    manifest.record("downloads", "2024-07-31", [], fetched_at)
+    manifest.record(  # stale
+        "downloads",
+        "2024-08-31",
+        [],
+        dt.datetime(2024, 9, 1, tzinfo=dt.timezone.utc),
+    )
+    today = dt.date(2024, 10, 15)
+
+    assert ("2024-07", "2024-10") == manifest.get_since_last_period(
+        ["views", "downloads"], today
+    )
+    assert ("2024-08", "2024-10") == manifest.get_since_last_period(
+        ["downloads"], today
+    )
+    assert manifest.get_since_last_period(["other"], today) is None
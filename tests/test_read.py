@@ -6,7 +6,13 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 
-from invenio_analytics_importer.read import read_raw_analytics_from_filepaths
+import pytest
+
+from invenio_analytics_importer.compression import open_text
+from invenio_analytics_importer.read import (
+    read_analytics_by_day,
+    read_raw_analytics_from_filepaths,
+)
 from invenio_analytics_importer.write import write_json
 
 
@@ -86,3 +92,49 @@ def test_read_raw_analytics_from_filepaths(tmp_path):
     assert download_dict_2024_08_31_2 == raw_analytics[1][1]
     assert "2024-08-30" == raw_analytics[2][0]
     assert view_dict_2024_08_30 == raw_analytics[2][1]
+
+
+@pytest.mark.parametrize("extension", [".gz", ".xz", ".zst"])
+def test_read_raw_analytics_from_compressed_filepaths(tmp_path, extension):
+    analytics = {
+        "2024-08-31": [
+            {
+                "label": f"prism.northwestern.edu/records/3s45v-k5m55/files/PNB-7-75.txt?download=1",  # noqa
+                "nb_hits": 1,
+                "nb_uniq_visitors": 1,
+                "nb_visits": 1,
+                "sum_time_spent": 0,
+            },
+        ]
+    }
+    fp = write_json(tmp_path / f"downloads_2024-08.json{extension}", analytics)
+
+    raw_analytics = list(read_raw_analytics_from_filepaths([fp]))
+
+    assert [("2024-08-31", analytics["2024-08-31"][0])] == raw_analytics
+    assert not fp.read_bytes().startswith(b"{")
+
+
+@pytest.mark.parametrize("extension", ["", ".gz"])
+def test_read_raw_analytics_from_ndjson_filepaths(tmp_path, extension):
+    fp = tmp_path / f"views_2024-08.ndjson{extension}"
+    lines = [
+        '["2024-08-01",{"label":"/records/3s45v-k5m55","nb_hits":4}]',
+        "",
+        '["2024-08-02",{"label":"/records/3s45v-k5m55","nb_hits":1}]',
+    ]
+    with open_text(fp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    raw_analytics = read_raw_analytics_from_filepaths([fp])
+
+    assert ("2024-08-01", {"label": "/records/3s45v-k5m55", "nb_hits": 4}) == (
+        next(raw_analytics)
+    )
+    assert [
+        ("2024-08-02", {"label": "/records/3s45v-k5m55", "nb_hits": 1})
+    ] == list(raw_analytics)
+    assert {
+        "2024-08-01": [{"label": "/records/3s45v-k5m55", "nb_hits": 4}],
+        "2024-08-02": [{"label": "/records/3s45v-k5m55", "nb_hits": 1}],
+    } == read_analytics_by_day(fp)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import datetime as dt
+import os
+
+from invenio_analytics_importer.response_cache import ResponseCache
+
+
+def test_response_cache_get_and_set(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=2**20)
+    key = cache.key(method="aMethod", site_id=3, day="2024-08-01")
+    analytics = [{"label": "/records/3s45v-k5m55", "nb_hits": 1}]
+
+    assert cache.get(key) is None
+    cache.set(key, analytics)
+
+    assert analytics == cache.get(key)
+    assert (1, 1) == (cache.hits, cache.misses)
+    # Size is restored from disk
+    assert cache.size == ResponseCache(tmp_path, max_size=2**20).size
+    assert key != cache.key(method="aMethod", site_id=4, day="2024-08-01")
+
+
+def test_response_cache_is_cacheable(tmp_path):
+    cache = ResponseCache(
+        tmp_path, max_size=2**20, min_age_days=2, today=dt.date(2024, 8, 10)
+    )
+
+    assert cache.is_cacheable("2024-08-08")
+    assert not cache.is_cacheable("2024-08-09")
+    assert not cache.is_cacheable("2024-08-10")
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=2**20)
+    keys = [cache.key(day=f"2024-08-0{i}") for i in range(1, 4)]
+    for i, key in enumerate(keys):
+        cache.set(key, [{"label": f"/records/{i}"}])
+    # Make first entry the most recently used, and second the least
+    for i, key in enumerate([keys[1], keys[2], keys[0]]):
+        os.utime(cache._filepath(key), (i, i))
+
+    cache.max_size = cache.size - 1
+    cache.evict()
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
@@ -6,18 +6,29 @@
 # modify it under the terms of the MIT License; see LICENSE file for more
 # details.
 
+import asyncio
 import dataclasses
+import datetime as dt
 import json
 
+import httpx
 import pytest
 
+from invenio_analytics_importer.manifest import Manifest
+from invenio_analytics_importer.read import read_analytics_by_day
+from invenio_analytics_importer.response_cache import ResponseCache
 from invenio_analytics_importer.retrieve import (
     DownloadsFetcher,
     MatomoAnalytics,
+    MonthlyFilesWriter,
     ProviderClient,
     ViewsFetcher,
     fetch_monthly_analytics,
+    fetch_period_analytics,
+    fetch_period_windows,
+    split_into_windows,
 )
+from invenio_analytics_importer.throttle import RetryPolicy
 
 
 @dataclasses.dataclass
@@ -103,6 +114,287 @@ async def test_matomo_get_analytics_for_day(running_app):
     assert [] == result
 
 
+@pytest.mark.asyncio
+async def test_matomo_get_analytics_for_days():
+    analytics_2024_08_01 = [
+        {
+            "label": f"prism.northwestern.edu/records/paah4-s0w35/files/PNB-7-75.txt?download=1",  # noqa
+            "nb_hits": 1,
+            "nb_uniq_visitors": 1,
+            "nb_visits": 1,
+            "sum_time_spent": 0,
+        },
+    ]
+    fake_client = FakeClient()
+    base_url = "https://matomo.example.org/"
+    fake_client.set_response(
+        (base_url, "2024-08-01,2024-08-03"),
+        json.dumps({"2024-08-01": analytics_2024_08_01, "2024-08-02": []})
+    )
+    fake_client.set_response(
+        (base_url, "2024-08-04,2024-08-05"), "No data available"
+    )
+    matomo = MatomoAnalytics(fake_client, base_url, 3, "token")
+
+    # Test with data
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-01", "2024-08-02", "2024-08-03"]
+    )
+
+    assert {
+        "2024-08-01": analytics_2024_08_01,
+        "2024-08-02": [],
+        "2024-08-03": [],
+    } == result
+
+    # Test when no data available
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-04", "2024-08-05"]
+    )
+
+    assert {"2024-08-04": [], "2024-08-05": []} == result
+
+
+class FlakyClient:
+    """Fake httpx client returning given responses in sequence."""
+
+    def __init__(self, outcomes):
+        """Constructor."""
+        self.outcomes = outcomes
+        self.calls = 0
+
+    async def post(self, url, params=None, data=None):
+        """Post."""
+        outcome = self.outcomes[self.calls]
+        self.calls += 1
+        request = httpx.Request("POST", url)
+        if isinstance(outcome, Exception):
+            outcome.request = request
+            raise outcome
+        status_code, text = outcome
+        return httpx.Response(status_code, text=text, request=request)
+
+
+@pytest.mark.asyncio
+async def test_matomo_retries_transient_errors():
+    analytics = [{"label": "/records/paah4-s0w35", "nb_hits": 1}]
+    client = FlakyClient(
+        [
+            httpx.ConnectTimeout("timed out"),
+            (502, "Bad Gateway"),
+            (200, json.dumps(analytics)),
+        ]
+    )
+    matomo = MatomoAnalytics(
+        client,
+        "https://matomo.example.org/",
+        3,
+        "token",
+        retry_policy=RetryPolicy(attempts=3, base_delay=0),
+    )
+
+    result = await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+
+    assert analytics == result
+    assert 3 == client.calls
+    assert [] == matomo.failures
+
+
+@pytest.mark.asyncio
+async def test_matomo_reports_failures():
+    client = FlakyClient([(503, ""), (503, ""), (403, "")])
+    matomo = MatomoAnalytics(
+        client,
+        "https://matomo.example.org/",
+        3,
+        "token",
+        retry_policy=RetryPolicy(attempts=2, base_delay=0),
+    )
+
+    assert [] == await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+    # Not transient so not retried
+    assert [] == await matomo.get_analytics_for_day("aMethod", "2024-08-02")
+
+    assert 3 == client.calls
+    assert ["2024-08-01", "2024-08-02"] == [f.date for f in matomo.failures]
+
+
+@pytest.mark.parametrize("slim", [False, True])
+@pytest.mark.asyncio
+async def test_matomo_reports_errors_of_successful_responses(tmp_path, slim):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        body = {"result": "error", "message": "Invalid token"}
+        return httpx.Response(200, json=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    response_cache = ResponseCache(
+        tmp_path, 2**20, today=dt.date(2024, 9, 1)
+    )
+    matomo = MatomoAnalytics(
+        client,
+        "https://matomo.example.org/",
+        3,
+        "token",
+        response_cache=response_cache,
+        slim=slim,
+    )
+
+    assert [] == await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+    assert ["2024-08-01"] == [f.date for f in matomo.failures]
+    assert "Invalid token" in matomo.failures[0].error
+
+    # Not cached: requested again
+    await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+    assert 2 == len(calls)
+
+
+class PagingClient:
+    """Fake httpx client serving analytics by page."""
+
+    def __init__(self, analytics):
+        """Constructor."""
+        self.analytics = analytics
+        self.params = []
+
+    async def post(self, url, params=None, data=None):
+        """Post."""
+        self.params.append(params)
+        start = params["filter_offset"]
+        end = start + params["filter_limit"]
+        date = params["date"]
+        if "," in date:
+            body = {day: a[start:end] for day, a in self.analytics.items()}
+        else:
+            body = self.analytics[date][start:end]
+        return httpx.Response(
+            200, json=body, request=httpx.Request("POST", url)
+        )
+
+
+@pytest.mark.asyncio
+async def test_matomo_filters_and_paginates():
+    analytics = {
+        "2024-08-01": [{"label": f"/records/{i}"} for i in range(5)],
+        "2024-08-02": [{"label": f"/records/{i}"} for i in range(2)],
+    }
+    client = PagingClient(analytics)
+    matomo = MatomoAnalytics(
+        client,
+        "https://matomo.example.org/",
+        3,
+        "token",
+        filter_pattern="/records/",
+        page_size=2,
+    )
+
+    result = await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+
+    assert analytics["2024-08-01"] == result
+    assert [0, 2, 4] == [p["filter_offset"] for p in client.params]
+    assert {"/records/"} == {p["filter_pattern"] for p in client.params}
+
+    client.params = []
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-01", "2024-08-02"]
+    )
+
+    assert analytics == result
+    assert [0, 2, 4] == [p["filter_offset"] for p in client.params]
+
+
+@pytest.mark.asyncio
+async def test_matomo_uses_response_cache(tmp_path):
+    analytics = {
+        "2024-08-01": [{"label": "/records/1"}],
+        "2024-08-02": [{"label": "/records/2"}],
+        "2024-08-03": [{"label": "/records/3"}],
+    }
+    client = PagingClient(analytics)
+    response_cache = ResponseCache(
+        tmp_path, max_size=2**20, today=dt.date(2024, 8, 4)
+    )
+    matomo = MatomoAnalytics(
+        client,
+        "https://matomo.example.org/",
+        3,
+        "token",
+        page_size=10,
+        response_cache=response_cache,
+    )
+
+    result = await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+    assert analytics["2024-08-01"] == result
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-01", "2024-08-02", "2024-08-03"]
+    )
+
+    assert analytics == result
+    # 2024-08-01 from cache and 2024-08-03 is too recent to be cached
+    assert ["2024-08-01", "2024-08-02,2024-08-03"] == [
+        p["date"] for p in client.params
+    ]
+
+    client.params = []
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-01", "2024-08-02", "2024-08-03"]
+    )
+
+    assert analytics == result
+    assert ["2024-08-03"] == [p["date"] for p in client.params]
+
+
+async def chunked(content, size):
+    """Yield content in chunks of size (split items across chunks)."""
+    for i in range(0, len(content), size):
+        yield content[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_matomo_slim_streams_and_keeps_only_records():
+    analytics = {
+        "2024-08-01": [
+            {"label": "/records/1", "nb_hits": 2, "nb_visits": 1, "x": 0},
+            {"label": "/search", "nb_hits": 9, "nb_visits": 9},
+            {"label": "/records/2", "nb_hits": 1, "nb_visits": 1},
+        ],
+        "2024-08-02": [],
+    }
+
+    def handler(request):
+        """Respond with analytics of requested date(s)."""
+        date = request.url.params["date"]
+        if "," in date:
+            content = json.dumps(analytics)
+        elif date in analytics:
+            content = json.dumps(analytics[date])
+        else:
+            content = "No data available"
+        return httpx.Response(200, content=chunked(content.encode(), 7))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    matomo = MatomoAnalytics(
+        client, "https://matomo.example.org/", 3, "token", slim=True
+    )
+    expected = [
+        {"label": "/records/1", "nb_hits": 2, "nb_visits": 1},
+        {"label": "/records/2", "nb_hits": 1, "nb_visits": 1},
+    ]
+
+    result = await matomo.get_analytics_for_day("aMethod", "2024-08-01")
+    assert expected == result
+
+    result = await matomo.get_analytics_for_days(
+        "aMethod", ["2024-08-01", "2024-08-02"]
+    )
+    assert {"2024-08-01": expected, "2024-08-02": []} == result
+
+    result = await matomo.get_analytics_for_day("aMethod", "2024-08-03")
+    assert [] == result
+
+
 class FakeProviderClient(ProviderClient):
     """Fave provider client."""
 
@@ -124,6 +416,15 @@ async def test_downloads_fetcher():
 
     assert [{"downloads": 1}] == results
 
+    results = await fetcher.fetch_analytics_for_days(
+        ["2024-08-30", "2024-08-31"]
+    )
+
+    assert {
+        "2024-08-30": [{"downloads": 1}],
+        "2024-08-31": [{"downloads": 1}],
+    } == results
+
 
 @pytest.mark.asyncio
 async def test_views_fetcher():
@@ -141,6 +442,7 @@ class FakeFetcher:
     def __init__(self):
         """Constructor."""
         self._response_data = {}
+        self.requests = []
 
     def set_response(self, day, json_list):
         """Register a response."""
@@ -148,8 +450,14 @@ class FakeFetcher:
 
     async def fetch_analytics_for_day(self, day):
         """Fetch download analytics for given day."""
+        self.requests.append([day])
         return self._response_data.get(day, [])
 
+    async def fetch_analytics_for_days(self, days):
+        """Fetch download analytics for given days."""
+        self.requests.append(days)
+        return {day: self._response_data.get(day, []) for day in days}
+
 
 @pytest.mark.asyncio
 async def test_fetch_monthly_analytics():
@@ -203,3 +511,205 @@ async def test_fetch_monthly_analytics():
     # non filled should just be []
     # just take 1 random entry
     assert [] == analytics["2024-01-02"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_monthly_analytics_with_multiple_days_per_request():
+    fetcher = FakeFetcher()
+    analytics_2024_02_29 = [
+        {
+            "label": f"/files/PNB 7 76.txt?download=1",
+            "nb_hits": 4,
+            "nb_uniq_visitors": 3,
+            "nb_visits": 2,
+            "sum_time_spent": 0,
+        },
+    ]
+    fetcher.set_response("2024-02-29", analytics_2024_02_29)
+    period = ("2024-01", "2024-02")
+
+    monthly_analytics = []
+    async for e in fetch_monthly_analytics(fetcher, period, 10):
+        monthly_analytics.append(e)
+
+    # 31 days -> 4 windows, 29 days -> 3 windows
+    assert 7 == len(fetcher.requests)
+    assert ["2024-01-31"] == fetcher.requests[3]
+    assert ["2024-02-21", "2024-02-29"] == fetcher.requests[6][::8]
+    month, analytics = monthly_analytics[1]
+    assert "2024-02" == month
+    assert 29 == len(analytics)
+    assert analytics_2024_02_29 == analytics["2024-02-29"]
+    assert [] == analytics["2024-02-01"]
+
+
+class SlowFetcher:
+    """Fetcher keeping track of requests in flight."""
+
+    def __init__(self, in_flight):
+        """Constructor."""
+        self.in_flight = in_flight
+
+    async def fetch_analytics_for_day(self, day):
+        """Fetch analytics for given day."""
+        self.in_flight["current"] += 1
+        self.in_flight["max"] = max(
+            self.in_flight["max"], self.in_flight["current"]
+        )
+        # Make early days the slowest
+        await asyncio.sleep(0.01 if day.endswith("-01") else 0)
+        self.in_flight["current"] -= 1
+        return [{"day": day}]
+
+
+@pytest.mark.asyncio
+async def test_fetch_period_analytics():
+    in_flight = {"current": 0, "max": 0}
+    fetchers = {
+        "views": SlowFetcher(in_flight),
+        "downloads": SlowFetcher(in_flight),
+    }
+    period = ("2023-12", "2024-02")
+
+    results = []
+    async for e in fetch_period_analytics(fetchers, period, concurrency=5):
+        results.append(e)
+
+    assert 5 == in_flight["max"]
+    assert [
+        ("views", "2023-12"),
+        ("downloads", "2023-12"),
+        ("views", "2024-01"),
+        ("downloads", "2024-01"),
+        ("views", "2024-02"),
+        ("downloads", "2024-02"),
+    ] == [(kind, year_month) for kind, year_month, _ in results]
+    _, _, analytics = results[-1]
+    assert 29 == len(analytics)
+    assert [{"day": "2024-02-29"}] == analytics["2024-02-29"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_period_windows_bounds_lookahead():
+    fetched = []
+
+    class Fetcher:
+        """Fetcher keeping track of fetched days."""
+
+        async def fetch_analytics_for_day(self, day):
+            """Fetch analytics for given day."""
+            # The very first day is much slower than all others
+            await asyncio.sleep(0.05 if day == "2020-01-01" else 0)
+            fetched.append(day)
+            return []
+
+    windows = fetch_period_windows(
+        {"views": Fetcher()}, ("2020-01", "2029-12"), concurrency=5
+    )
+    await windows.__anext__()
+    await windows.aclose()
+
+    # Not all 3653 days, only up to the lookahead
+    assert len(fetched) <= 2 * 5
+
+
+def test_split_into_windows():
+    days = [
+        "2024-02-01", "2024-02-02", "2024-02-03",
+        "2024-02-05",
+        "2024-02-07", "2024-02-08",
+    ]
+
+    assert [
+        ["2024-02-01", "2024-02-02"],
+        ["2024-02-03"],
+        ["2024-02-05"],
+        ["2024-02-07", "2024-02-08"],
+    ] == split_into_windows(days, 2)
+
+
+@pytest.mark.asyncio
+async def test_fetch_period_analytics_only_included_days():
+    fetcher = FakeFetcher()
+    period = ("2024-02", "2024-02")
+
+    def include(kind, day):
+        return day in ("2024-02-10", "2024-02-11", "2024-02-20")
+
+    results = []
+    analytics_by_month = fetch_period_analytics(
+        {"views": fetcher}, period, 5, 10, include
+    )
+    async for e in analytics_by_month:
+        results.append(e)
+
+    assert [["2024-02-10", "2024-02-11"], ["2024-02-20"]] == fetcher.requests
+    _, _, analytics = results[0]
+    assert ["2024-02-10", "2024-02-11", "2024-02-20"] == sorted(analytics)
+
+
+def test_monthly_files_writer_merges_other_format(tmp_path):
+    manifest = Manifest.load(tmp_path)
+    writer = MonthlyFilesWriter(tmp_path, manifest, lambda kind: set())
+    writer.write("views", "2024-08", {"2024-08-01": [{"label": "/a"}]})
+    writer.close()
+
+    # Resume with other options than the original run
+    writer = MonthlyFilesWriter(
+        tmp_path,
+        Manifest.load(tmp_path),
+        lambda kind: set(),
+        compression="gzip",
+        merge=True,
+        file_format="ndjson",
+    )
+    writer.write("views", "2024-08", {"2024-08-02": [{"label": "/b"}]})
+    writer.close()
+
+    assert ["views_2024-08.ndjson.gz"] == sorted(
+        fp.name for fp in tmp_path.glob("views_*")
+    )
+    assert {
+        "2024-08-01": [{"label": "/a"}],
+        "2024-08-02": [{"label": "/b"}],
+    } == read_analytics_by_day(tmp_path / "views_2024-08.ndjson.gz")
+
+
+@pytest.mark.parametrize("file_format", ["json", "ndjson"])
+def test_monthly_files_writer_merges_and_records(tmp_path, file_format):
+    manifest = Manifest.load(tmp_path)
+    failed = {"views": {"2024-08-03"}}
+    writer = MonthlyFilesWriter(
+        tmp_path,
+        manifest,
+        lambda kind: failed.get(kind, set()),
+        file_format=file_format,
+    )
+    writer.write(
+        "views",
+        "2024-08",
+        {"2024-08-01": [{"label": "/a"}], "2024-08-03": [{"label": "/c"}]},
+    )
+    writer.close()
+
+    # Resume: 2024-08-03 is refetched, but fails again
+    writer = MonthlyFilesWriter(
+        tmp_path,
+        Manifest.load(tmp_path),
+        lambda kind: failed.get(kind, set()),
+        merge=True,
+        file_format=file_format,
+    )
+    writer.write(
+        "views", "2024-08", {"2024-08-02": [{"label": "/b"}], "2024-08-03": []}
+    )
+    writer.close()
+
+    assert {
+        "2024-08-01": [{"label": "/a"}],
+        "2024-08-02": [{"label": "/b"}],
+        "2024-08-03": [{"label": "/c"}],
+    } == read_analytics_by_day(tmp_path / f"views_2024-08.{file_format}")
+    assert ["2024-08-01", "2024-08-02"] == sorted(
+        Manifest.load(tmp_path).entries["views"]
+    )
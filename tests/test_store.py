@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import invenio_analytics_importer.store as store_module
+from invenio_analytics_importer.store import LookupStore
+
+
+class FakeClock:
+    """Settable clock."""
+
+    def __init__(self):
+        """Constructor."""
+        self.now = 1000.0
+
+    def __call__(self):
+        """Return current time."""
+        return self.now
+
+
+def test_lookup_store_save_and_load(tmp_path):
+    store = LookupStore(tmp_path, ttl=10)
+    store.save(
+        {
+            "3s45v-k5m55": {
+                "parent_pid": "abcde-fghij",
+                "bucket_id": "b1",
+                "files": [("a.txt", "f1", 12), ("b.txt", "f2", 34)],
+            },
+        },
+        with_files=True,
+    )
+    store.save({"y4dqk-7yj30": {"parent_pid": "klmno-pqrst"}})
+    store.close()
+
+    store = LookupStore(tmp_path, ttl=10)
+    assert {
+        "3s45v-k5m55": {"parent_pid": "abcde-fghij"},
+        "y4dqk-7yj30": {"parent_pid": "klmno-pqrst"},
+    } == store.load(["3s45v-k5m55", "y4dqk-7yj30", "notin-store"])
+    # Entries saved without files don't count when files are needed
+    assert {
+        "3s45v-k5m55": {
+            "parent_pid": "abcde-fghij",
+            "bucket_id": "b1",
+            "files": [("a.txt", "f1", 12), ("b.txt", "f2", 34)],
+        },
+    } == store.load(["3s45v-k5m55", "y4dqk-7yj30"], with_files=True)
+
+
+def test_lookup_store_expires_entries(tmp_path):
+    clock = FakeClock()
+    store = LookupStore(tmp_path, ttl=10, clock=clock)
+    store.save({"3s45v-k5m55": {"parent_pid": "abcde-fghij"}})
+
+    clock.now += 9
+    assert ["3s45v-k5m55"] == list(store.load(["3s45v-k5m55"]))
+    clock.now += 1
+    assert {} == store.load(["3s45v-k5m55"])
+
+
+def test_lookup_store_invalidate(tmp_path):
+    store = LookupStore(tmp_path)
+    pids = [f"{i:05}-00000" for i in range(1200)]
+    store.save({pid: {"parent_pid": "abcde-fghij"} for pid in pids})
+
+    store.invalidate(pids[:1000])
+    assert pids[1000:] == sorted(store.load(pids))
+
+    store.invalidate()
+    assert {} == store.load(pids)
+
+
+def test_lookup_store_missing_pids(tmp_path):
+    clock = FakeClock()
+    store = LookupStore(tmp_path, missing_ttl=10, clock=clock)
+    store.save_missing(["n0t-a-rec0rd", "deleted-rec"])
+    store.close()
+
+    store = LookupStore(tmp_path, missing_ttl=10, clock=clock)
+    assert {"n0t-a-rec0rd", "deleted-rec"} == store.load_missing(
+        ["n0t-a-rec0rd", "deleted-rec", "3s45v-k5m55"]
+    )
+    store.invalidate(["deleted-rec"])
+    assert {"n0t-a-rec0rd"} == store.load_missing(
+        ["n0t-a-rec0rd", "deleted-rec"]
+    )
+    clock.now += 10
+    assert set() == store.load_missing(["n0t-a-rec0rd"])
+
+
+def test_lookup_store_missing_filter_grows(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, "DEFAULT_MISSING_CAPACITY", 10)
+    store = LookupStore(tmp_path)
+    pids = [f"{i:05}-00000" for i in range(25)]
+
+    store.save_missing(pids)
+
+    assert store.missing_filter.capacity >= 25
+    assert set(pids) == store.load_missing(pids)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import json
+
+import pytest
+
+from invenio_analytics_importer.stream import JSONItemsDecoder
+
+
+def decode_in_chunks(text, size):
+    decoder = JSONItemsDecoder()
+    items = []
+    for i in range(0, len(text), size):
+        items += decoder.feed(text[i:i + size])
+    decoder.close()
+    return decoder, items
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_decoder_array(size):
+    document = [{"label": "/records/1", "nb_hits": 12}, 3.25, "a]b", []]
+
+    decoder, items = decode_in_chunks(json.dumps(document), size)
+
+    assert not decoder.is_object
+    assert [(None, item) for item in document] == items
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_decoder_object_of_arrays(size):
+    document = {
+        "2024-08-01": [{"label": "/records/1"}, {"label": "/records/2"}],
+        "skipped": {"a": [1, 2]},
+        "2024-08-02": [],
+        "2024-08-03": [{"label": "/records/3"}],
+    }
+
+    decoder, items = decode_in_chunks(json.dumps(document, indent=2), size)
+
+    assert decoder.is_object
+    assert [
+        ("2024-08-01", {"label": "/records/1"}),
+        ("2024-08-01", {"label": "/records/2"}),
+        ("2024-08-03", {"label": "/records/3"}),
+    ] == items
+    assert {"skipped": {"a": [1, 2]}} == decoder.members
+
+
+def test_decoder_text():
+    decoder, items = decode_in_chunks("No data available", 4)
+
+    assert [] == items
+    assert "No data available" == decoder.text
+
+
+def test_decoder_incomplete():
+    decoder = JSONItemsDecoder()
+    decoder.feed('[{"label": "/records/1"}')
+
+    with pytest.raises(ValueError):
+        decoder.close()
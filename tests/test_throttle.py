@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import asyncio
+
+import pytest
+
+from invenio_analytics_importer.throttle import (
+    AdaptiveConcurrencyLimiter,
+    AIMDController,
+    RetryPolicy,
+    TokenBucket,
+)
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(attempts=5, base_delay=1, max_delay=3)
+
+    assert 0 <= policy.delay(1) <= 1
+    assert 0 <= policy.delay(2) <= 2
+    assert 0 <= policy.delay(5) <= 3
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        """Constructor."""
+        self.now = 0
+
+    def __call__(self):
+        """Current time."""
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1000, capacity=2, clock=clock)
+
+    await bucket.acquire()
+    await bucket.acquire()
+    assert bucket.tokens < 1
+
+    clock.now = 0.001  # 1 token refilled
+    await bucket.acquire()
+    assert bucket.tokens < 1
+
+
+def test_aimd_controller():
+    controller = AIMDController(initial=4, minimum=1, maximum=8)
+
+    for _ in range(4):
+        controller.on_success()
+    assert 4 == controller.value  # ~ +1 per round of 4 successes (3.99...)
+    controller.on_success()
+    assert 5 == controller.value
+
+    controller.on_overload()
+    assert 2 == controller.value
+    controller.on_overload()
+    controller.on_overload()
+    assert 1 == controller.value
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_limiter_limits_in_flight():
+    limiter = AdaptiveConcurrencyLimiter(maximum=3)
+    in_flight = {"current": 0, "max": 0}
+
+    async def operation():
+        async with limiter:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            await asyncio.sleep(0)
+            in_flight["current"] -= 1
+
+    await asyncio.gather(*[operation() for _ in range(10)])
+
+    assert 3 == in_flight["max"]
+
+
+def test_adaptive_concurrency_limiter_backs_off():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(maximum=16, clock=clock)
+
+    # Burst of overloads is a single congestion event
+    limiter.on_overload()
+    limiter.on_overload()
+    assert 8 == limiter.limit
+
+    # Latency going up is also a congestion signal
+    clock.now = 10
+    limiter.on_success(0.1)
+    for _ in range(10):
+        limiter.on_success(1)
+    assert 4 == limiter.limit
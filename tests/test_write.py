@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Northwestern University.
+#
+# invenio-analytics-importer is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+import gzip
+
+import pytest
+
+from invenio_analytics_importer.read import read_raw_analytics_from_filepaths
+from invenio_analytics_importer.write import (
+    JSONObjectWriter,
+    NDJSONWriter,
+    write_json,
+    write_raw_analytics,
+)
+
+
+@pytest.fixture
+def monthly_analytics():
+    """Analytics of a month."""
+    return {
+        "2024-08-01": [
+            {
+                "label": "example.org/records/3s45v-k5m55/files/a b.txt?download=1",  # noqa
+                "nb_hits": 2,
+                "nb_visits": 1,
+            },
+            {
+                "label": "example.org/records/3s45v-k5m55",
+                "nb_hits": 1,
+                "nb_visits": 1,
+            },
+        ],
+        "2024-08-02": [],
+        "2024-08-03": [{"label": "/", "nb_hits": 4, "nb_visits": 3}],
+    }
+
+
+def test_json_object_writer_matches_write_json(tmp_path, monthly_analytics):
+    expected_fp = write_json(tmp_path / "expected.json", monthly_analytics)
+
+    with JSONObjectWriter(tmp_path / "streamed.json") as writer:
+        for day, analytics in monthly_analytics.items():
+            writer.write(day, analytics)
+
+    assert expected_fp.read_text() == writer.filepath.read_text()
+
+
+def test_json_object_writer_compact(tmp_path, monthly_analytics):
+    with JSONObjectWriter(tmp_path / "compact.json", indent=None) as writer:
+        for day, analytics in monthly_analytics.items():
+            writer.write(day, analytics)
+
+    assert "\n" not in writer.filepath.read_text()
+    raw_analytics = list(read_raw_analytics_from_filepaths([writer.filepath]))
+    assert 3 == len(raw_analytics)
+    assert ("2024-08-03", monthly_analytics["2024-08-03"][0]) == raw_analytics[2]  # noqa
+
+
+def test_json_object_writer_empty(tmp_path):
+    with JSONObjectWriter(tmp_path / "empty.json") as writer:
+        pass
+
+    assert "{}" == writer.filepath.read_text()
+
+
+def test_json_object_writer_aborted(tmp_path):
+    with pytest.raises(RuntimeError):
+        with JSONObjectWriter(tmp_path / "aborted.json") as writer:
+            writer.write("2024-08-01", [])
+            raise RuntimeError()
+
+    assert [] == list(tmp_path.iterdir())
+
+
+def test_json_object_writer_compressed(tmp_path, monthly_analytics):
+    expected_fp = write_json(tmp_path / "expected.json", monthly_analytics)
+
+    with JSONObjectWriter(tmp_path / "streamed.json.gz") as writer:
+        for day, analytics in monthly_analytics.items():
+            writer.write(day, analytics)
+
+    assert expected_fp.read_text() == gzip.decompress(
+        writer.filepath.read_bytes()
+    ).decode()
+
+
+def test_json_object_writer_carry_over(tmp_path, monthly_analytics):
+    carry_over = {
+        "2024-08-01": [{"label": "/", "nb_hits": 1, "nb_visits": 1}],
+        "2024-08-02": [],
+        "2024-08-04": [],
+    }
+
+    with JSONObjectWriter(
+        tmp_path / "merged.json", carry_over=carry_over
+    ) as writer:
+        writer.write("2024-08-01", monthly_analytics["2024-08-01"])
+        writer.write("2024-08-03", monthly_analytics["2024-08-03"])
+
+    expected_fp = write_json(
+        tmp_path / "expected.json",
+        {
+            "2024-08-01": monthly_analytics["2024-08-01"],
+            "2024-08-02": [],
+            "2024-08-03": monthly_analytics["2024-08-03"],
+            "2024-08-04": [],
+        },
+    )
+    assert expected_fp.read_text() == writer.filepath.read_text()
+
+
+def test_ndjson_writer(tmp_path, monthly_analytics):
+    fp = tmp_path / "views_2024-08.ndjson"
+
+    with NDJSONWriter(fp) as writer:
+        for day, analytics_of_day in monthly_analytics.items():
+            writer.write(day, analytics_of_day)
+
+    lines = fp.read_text().splitlines()
+    assert 3 == len(lines)
+    assert lines[0].startswith('["2024-08-01",{"label":')
+    assert [
+        (day, analytic)
+        for day, analytics_of_day in monthly_analytics.items()
+        for analytic in analytics_of_day
+    ] == list(read_raw_analytics_from_filepaths([fp]))
+
+
+def test_write_raw_analytics_converts(tmp_path, monthly_analytics):
+    json_fp = write_json(tmp_path / "views_2024-08.json", monthly_analytics)
+
+    ndjson_fp = write_raw_analytics(
+        tmp_path / "views_2024-08.ndjson.gz",
+        read_raw_analytics_from_filepaths([json_fp]),
+    )
+    back_fp = write_raw_analytics(
+        tmp_path / "back.json", read_raw_analytics_from_filepaths([ndjson_fp])
+    )
+
+    assert gzip.open(ndjson_fp, "rt").readline().startswith('["2024-08-01"')
+    # Days without analytics have no line in NDJSON
+    del monthly_analytics["2024-08-02"]
+    expected_fp = write_json(tmp_path / "expected.json", monthly_analytics)
+    assert expected_fp.read_text() == back_fp.read_text()